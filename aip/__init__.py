@@ -0,0 +1,6 @@
+##################################################################
+#
+# aipParser package. aip.core holds the crawler and the command line,
+# aip.regions the region plugins.
+#
+##################################################################
@@ -0,0 +1,2654 @@
+##################################################################
+#
+# Core of aipParser: the AIRAC schedule, fetching and parsing pages,
+# crawling the drome pages, and writing, serving and indexing the JSON
+# libraries. The region specific parsers are plugins in aip/regions,
+# loaded only for the region being generated.
+#
+# Run it with aipParser.py, see there for example run lines.
+#
+##################################################################
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import datetime
+import fnmatch
+import gzip
+import hashlib
+import heapq
+import importlib
+import itertools
+import json
+import logging
+import os
+import traceback
+import queue
+import random
+import re
+import socket
+import sqlite3
+import ssl
+import subprocess
+import sys
+import threading
+import time
+import urllib.error, urllib.parse
+
+# peak memory is only reported where the resource module is available
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# AIP schedule gotten from:
+#   https://nats-uk.ead-it.com/cms-nats/export/sites/default/en/Publications/publication-schedule/10-year-AIRAC.pdf
+# remember when you remove dates you need to alter the offset for NO and ES
+# AIRAC Number, SPONSOR Change Requests CUTOFF, AMDT PUBLISHED, AIRAC EFFECTIVE DATE
+effectiveDates = [
+    [ "AIRAC 01/2022", "2021-10-29", "2021-12-16", "2022-01-27" ],
+    [ "AIRAC 02/2022", "2021-11-26", "2022-01-13", "2022-02-24" ],
+    [ "AIRAC 03/2022", "2021-12-17", "2022-02-10", "2022-03-24" ],
+    [ "AIRAC 04/2022", "2022-01-21", "2022-03-10", "2022-04-21" ],
+    [ "AIRAC 05/2022", "2022-02-18", "2022-04-07", "2022-05-19" ],
+    [ "AIRAC 06/2022", "2022-03-18", "2022-05-05", "2022-06-16" ],
+    [ "AIRAC 07/2022", "2022-04-15", "2022-06-02", "2022-07-14" ],
+    [ "AIRAC 08/2022", "2022-05-13", "2022-06-30", "2022-08-11" ],
+    [ "AIRAC 09/2022", "2022-06-10", "2022-07-28", "2022-09-08" ],
+    [ "AIRAC 10/2022", "2022-07-08", "2022-08-25", "2022-10-06" ],
+    [ "AIRAC 11/2022", "2022-08-05", "2022-09-22", "2022-11-03" ],
+    [ "AIRAC 12/2022", "2022-09-02", "2022-10-20", "2022-12-01" ],
+    [ "AIRAC 13/2022", "2022-09-30", "2022-11-17", "2022-12-29" ],
+    [ "AIRAC 01/2023", "2022-10-28", "2022-12-15", "2023-01-26" ],
+    [ "AIRAC 02/2023", "2022-11-25", "2023-01-12", "2023-02-23" ],
+    [ "AIRAC 03/2023", "2022-12-16", "2023-02-09", "2023-03-23" ],
+    [ "AIRAC 04/2023", "2023-01-20", "2023-03-09", "2023-04-20" ],
+    [ "AIRAC 05/2023", "2023-02-17", "2023-04-06", "2023-05-18" ],
+    [ "AIRAC 06/2023", "2023-03-17", "2023-05-04", "2023-06-15" ],
+    [ "AIRAC 07/2023", "2023-04-14", "2023-06-01", "2023-07-13" ],
+    [ "AIRAC 08/2023", "2023-05-12", "2023-06-29", "2023-08-10" ],
+    [ "AIRAC 09/2023", "2023-06-09", "2023-07-27", "2023-09-07" ],
+    [ "AIRAC 10/2023", "2023-07-07", "2023-08-24", "2023-10-05" ],
+    [ "AIRAC 11/2023", "2023-08-04", "2023-09-21", "2023-11-02" ],
+    [ "AIRAC 12/2023", "2023-09-01", "2023-10-19", "2023-11-30" ],
+    [ "AIRAC 13/2023", "2023-09-29", "2023-11-16", "2023-12-28" ],
+    [ "AIRAC 01/2024", "2023-10-27", "2023-12-14", "2024-01-25" ],
+    [ "AIRAC 02/2024", "2023-11-24", "2024-01-11", "2024-02-22" ],
+    [ "AIRAC 03/2024", "2023-12-22", "2024-02-08", "2024-03-21" ],
+    [ "AIRAC 04/2024", "2024-01-19", "2024-03-07", "2024-04-18" ],
+    [ "AIRAC 05/2024", "2024-02-16", "2024-04-04", "2024-05-16" ],
+    [ "AIRAC 06/2024", "2024-03-15", "2024-05-02", "2024-06-13" ],
+    [ "AIRAC 07/2024", "2024-04-12", "2024-05-30", "2024-07-11" ],
+    [ "AIRAC 08/2024", "2024-05-10", "2024-06-27", "2024-08-08" ],
+    [ "AIRAC 09/2024", "2024-06-07", "2024-07-25", "2024-09-05" ],
+    [ "AIRAC 10/2024", "2024-07-05", "2024-08-22", "2024-10-03" ],
+    [ "AIRAC 11/2024", "2024-08-02", "2024-09-19", "2024-10-31" ],
+    [ "AIRAC 12/2024", "2024-08-30", "2024-10-17", "2024-11-28" ],
+    [ "AIRAC 13/2024", "2024-09-27", "2024-11-14", "2024-12-26" ],
+    [ "AIRAC 01/2025", "2024-10-25", "2024-12-12", "2025-01-23" ],
+    [ "AIRAC 02/2025", "2024-11-22", "2025-01-09", "2025-02-20" ],
+    [ "AIRAC 03/2025", "2024-12-20", "2025-02-06", "2025-03-20" ],
+    [ "AIRAC 04/2025", "2025-01-17", "2025-03-06", "2025-04-17" ],
+    [ "AIRAC 05/2025", "2025-02-14", "2025-04-03", "2025-05-15" ],
+    [ "AIRAC 06/2025", "2025-03-14", "2025-05-01", "2025-06-12" ],
+    [ "AIRAC 07/2025", "2025-04-11", "2025-05-29", "2025-07-10" ],
+    [ "AIRAC 08/2025", "2025-05-09", "2025-06-26", "2025-08-07" ],
+    [ "AIRAC 09/2025", "2025-06-06", "2025-07-24", "2025-09-04" ],
+    [ "AIRAC 10/2025", "2025-07-04", "2025-08-21", "2025-10-02" ],
+    [ "AIRAC 11/2025", "2025-08-01", "2025-09-18", "2025-10-30" ],
+    [ "AIRAC 12/2025", "2025-08-29", "2025-10-16", "2025-11-27" ],
+    [ "AIRAC 13/2025", "2025-09-26", "2025-11-13", "2025-12-25" ],
+    [ "AIRAC 01/2026", "2025-10-24", "2025-12-11", "2026-01-22" ],
+    [ "AIRAC 02/2026", "2025-11-21", "2026-01-08", "2026-02-19" ],
+    [ "AIRAC 03/2026", "2025-12-19", "2026-02-05", "2026-03-19" ],
+    [ "AIRAC 04/2026", "2026-01-16", "2026-03-05", "2026-04-16" ],
+    [ "AIRAC 05/2026", "2026-02-13", "2026-04-02", "2026-05-14" ],
+    [ "AIRAC 06/2026", "2026-03-13", "2026-04-30", "2026-06-11" ],
+    [ "AIRAC 07/2026", "2026-04-10", "2026-05-28", "2026-07-09" ],
+    [ "AIRAC 08/2026", "2026-05-08", "2026-06-25", "2026-08-06" ],
+    [ "AIRAC 09/2026", "2026-06-05", "2026-07-23", "2026-09-03" ],
+    [ "AIRAC 10/2026", "2026-07-03", "2026-08-20", "2026-10-01" ],
+    [ "AIRAC 11/2026", "2026-07-31", "2026-09-17", "2026-10-29" ],
+    [ "AIRAC 12/2026", "2026-08-28", "2026-10-15", "2026-11-26" ],
+    [ "AIRAC 13/2026", "2026-09-25", "2026-11-12", "2026-12-24" ],
+    [ "AIRAC 01/2027", "2026-10-23", "2026-12-10", "2027-01-21" ],
+    [ "AIRAC 02/2027", "2026-11-20", "2027-01-07", "2027-02-18" ],
+    [ "AIRAC 03/2027", "2026-12-18", "2027-02-04", "2027-03-18" ],
+    [ "AIRAC 04/2027", "2027-01-15", "2027-03-04", "2027-04-15" ],
+    [ "AIRAC 05/2027", "2027-02-12", "2027-04-01", "2027-05-13" ],
+    [ "AIRAC 06/2027", "2027-03-12", "2027-04-29", "2027-06-10" ],
+    [ "AIRAC 07/2027", "2027-04-09", "2027-05-27", "2027-07-08" ],
+    [ "AIRAC 08/2027", "2027-05-07", "2027-06-24", "2027-08-05" ],
+    [ "AIRAC 09/2027", "2027-06-04", "2027-07-22", "2027-09-02" ],
+    [ "AIRAC 10/2027", "2027-07-02", "2027-08-19", "2027-09-30" ],
+    [ "AIRAC 11/2027", "2027-07-30", "2027-09-16", "2027-10-28" ],
+    [ "AIRAC 12/2027", "2027-08-27", "2027-10-14", "2027-11-25" ],
+    [ "AIRAC 13/2027", "2027-09-24", "2027-11-11", "2027-12-23" ],
+    [ "AIRAC 01/2028", "2027-10-22", "2027-12-09", "2028-01-20" ],
+    [ "AIRAC 02/2028", "2027-11-19", "2028-01-06", "2028-02-17" ],
+    [ "AIRAC 03/2028", "2027-12-17", "2028-02-03", "2028-03-16" ],
+    [ "AIRAC 04/2028", "2028-01-14", "2028-03-02", "2028-04-13" ],
+    [ "AIRAC 05/2028", "2028-02-11", "2028-03-30", "2028-05-11" ],
+    [ "AIRAC 06/2028", "2028-03-10", "2028-04-27", "2028-06-08" ],
+    [ "AIRAC 07/2028", "2028-04-07", "2028-05-25", "2028-07-06" ],
+    [ "AIRAC 08/2028", "2028-05-05", "2028-06-22", "2028-08-03" ],
+    [ "AIRAC 09/2028", "2028-06-02", "2028-07-20", "2028-08-31" ],
+    [ "AIRAC 10/2028", "2028-06-30", "2028-08-17", "2028-09-28" ],
+    [ "AIRAC 11/2028", "2028-07-28", "2028-09-14", "2028-10-26" ],
+    [ "AIRAC 12/2028", "2028-08-25", "2028-10-12", "2028-11-23" ],
+    [ "AIRAC 13/2028", "2028-09-22", "2028-11-09", "2028-12-21" ],
+    [ "AIRAC 01/2029", "2028-10-20", "2028-12-07", "2029-01-18" ],
+    [ "AIRAC 02/2029", "2028-11-17", "2029-01-04", "2029-02-15" ],
+    [ "AIRAC 03/2029", "2028-12-15", "2029-02-01", "2029-03-15" ],
+    [ "AIRAC 04/2029", "2029-01-12", "2029-03-01", "2029-04-12" ],
+    [ "AIRAC 05/2029", "2029-02-09", "2029-03-29", "2029-05-10" ],
+    [ "AIRAC 06/2029", "2029-03-09", "2029-04-26", "2029-06-07" ],
+    [ "AIRAC 07/2029", "2029-04-06", "2029-05-24", "2029-07-05" ],
+    [ "AIRAC 08/2029", "2029-05-04", "2029-06-21", "2029-08-02" ],
+    [ "AIRAC 09/2029", "2029-06-01", "2029-07-19", "2029-08-30" ],
+    [ "AIRAC 10/2029", "2029-06-29", "2029-08-16", "2029-09-27" ],
+    [ "AIRAC 11/2029", "2029-07-27", "2029-09-13", "2029-10-25" ],
+    [ "AIRAC 12/2029", "2029-08-24", "2029-10-11", "2029-11-22" ],
+    [ "AIRAC 13/2029", "2029-09-21", "2029-11-08", "2029-12-20" ],
+    [ "AIRAC 01/2030", "2029-10-19", "2029-12-06", "2030-01-17" ],
+    [ "AIRAC 02/2030", "2029-11-16", "2030-01-03", "2030-02-14" ],
+    [ "AIRAC 03/2030", "2029-12-14", "2030-01-31", "2030-03-14" ],
+    [ "AIRAC 04/2030", "2030-01-11", "2030-02-28", "2030-04-11" ],
+    [ "AIRAC 05/2030", "2030-02-08", "2030-03-28", "2030-05-09" ],
+    [ "AIRAC 06/2030", "2030-03-08", "2030-04-25", "2030-06-06" ],
+    [ "AIRAC 07/2030", "2030-04-05", "2030-05-23", "2030-07-04" ],
+    [ "AIRAC 08/2030", "2030-05-03", "2030-06-20", "2030-08-01" ],
+    [ "AIRAC 09/2030", "2030-05-31", "2030-07-18", "2030-08-29" ],
+    [ "AIRAC 10/2030", "2030-06-28", "2030-08-15", "2030-09-26" ],
+    [ "AIRAC 11/2030", "2030-07-26", "2030-09-12", "2030-10-24" ],
+    [ "AIRAC 12/2030", "2030-08-23", "2030-10-10", "2030-11-21" ],
+    [ "AIRAC 13/2030", "2030-09-20", "2030-11-07", "2030-12-19" ]
+]
+
+# setup the logger, the file logger is only attached by main so
+# worker processes do not truncate the log file when they start
+logger = logging.getLogger("aipParser")
+
+# setup the console logger
+console = logging.StreamHandler()
+console.setLevel(logging.INFO)
+formatter = logging.Formatter("%(levelname)-8s: %(message)s")
+console.setFormatter(formatter)
+logging.getLogger("aipParser").addHandler(console)
+
+# set up what user agent we want to mimic, as some site block
+# unknown agent types
+#header_user_agent="Mozilla/5.0"
+header_user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_12_4) AppleWebKit/603.1.30 (KHTML, like Gecko) Version/10.1 Safari/603.1.30"
+
+# seconds to wait for a site to connect and start answering, and for
+# each read of the page once it starts arriving
+connectTimeout = 30
+readTimeout = 60
+
+# time.monotonic() time the whole run has to finish by, None for no deadline
+runDeadline = None
+
+# send a duplicate request when a page is slower than the host's p95 latency,
+# once we have seen enough requests to that host to know its p95
+hedgeRequests = False
+hedgeMinSamples = 10
+hostLatencies = {}
+hostLatenciesLock = threading.Lock()
+
+# define what section headers we want
+adType2 = "AD 2 AERODROMES"
+adType3 = "AD 3 HELIPORT"
+
+# structure to hold the page data
+aipPages = {
+    adType2 : {},
+    adType3 : {}
+}
+
+# pages fetched this run, keyed by canonical URL
+webPages = {}
+webPagesLock = threading.Lock()
+
+# the sort orders the JSON can be written in, chosen when writing the output
+# if its NAME then in the JSON we output NAME : CODE
+# if its CODE then in the JSON we output CODE - NAME
+sortOrders = ["NAME", "CODE"]
+
+# Chrome trace events recorded with --trace, None when not tracing, and the
+# region they are tagged with
+traceEvents = None
+traceEventsLock = threading.Lock()
+traceThreads = set()
+traceRegion = ""
+
+# progress events are written to stdout as JSON lines with --events, for a
+# service running this script to follow the run, see aip/service.py
+progressEvents = False
+progressEventsLock = threading.Lock()
+
+# libraries published by serve mode, cached by filename
+servedLibraries = {}
+servedLibrariesLock = threading.Lock()
+
+# optional filter on which dromes to crawl, set from the command line. When
+# set only the matching dromes are crawled and merged into the existing output
+dromeFilter = None
+
+# drome jobs sorted at a time when fetching the most expensive first, so
+# the fetches start before the whole main page is walked
+costWindow = 256
+
+# drome jobs the coordinator puts on the work queue per write, the queue is
+# only locked for the insert, not while the main page is walked
+queueBatchSize = 50
+
+
+#
+# Common routine to record a span of work as a Chrome trace complete event,
+# tagged with the region and the worker thread. Does nothing when not tracing.
+#
+@contextlib.contextmanager
+def traceSpan ( name, category, **spanArgs ):
+    if traceEvents is None:
+        yield
+        return
+
+    start = time.time_ns() // 1000
+    try:
+        yield
+    finally:
+        end = time.time_ns() // 1000
+        thread = threading.current_thread()
+        spanArgs["region"] = traceRegion
+        spanArgs["worker"] = thread.name
+        event = {
+                    "name" : name,
+                    "cat" : category,
+                    "ph" : "X",
+                    "ts" : start,
+                    "dur" : end - start,
+                    "pid" : os.getpid(),
+                    "tid" : thread.ident,
+                    "args" : spanArgs
+                }
+        with traceEventsLock:
+            # name each thread once so the viewer labels its row
+            if (event["pid"], event["tid"]) not in traceThreads:
+                traceThreads.add((event["pid"], event["tid"]))
+                traceEvents.append({ "name" : "thread_name", "ph" : "M", "pid" : event["pid"], "tid" : event["tid"], "args" : { "name" : thread.name } })
+            traceEvents.append(event)
+
+
+#
+# Common routine to start tracing, events from here on are recorded
+#
+def startTrace ( region ):
+    global traceEvents, traceRegion
+
+    if traceEvents is None:
+        traceEvents = []
+    traceRegion = region
+
+    return
+
+
+#
+# Common routine to start writing progress events
+#
+def startProgressEvents ():
+    global progressEvents
+
+    progressEvents = True
+
+    return
+
+
+#
+# Common routine to write a progress event, a JSON line on stdout. Does
+# nothing unless --events is set.
+#
+def emitEvent ( event, **fields ):
+    if not progressEvents:
+        return
+
+    line = json.dumps(dict({ "event" : event, "time" : round(time.time(), 3) }, **fields))
+    with progressEventsLock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+    return
+
+
+#
+# Common routine to write the recorded trace in Chrome trace event format,
+# which opens as a timeline in chrome://tracing or Perfetto
+#
+def writeTrace ( traceFilename ):
+    logger.info ("Writing trace file: {0}".format(traceFilename))
+    with traceEventsLock:
+        events = list(traceEvents or [])
+    try:
+        with open(traceFilename, "w", encoding = "utf8") as file:
+            json.dump({ "traceEvents" : events, "displayTimeUnit" : "ms" }, file)
+    except Exception as e:
+        logger.error (traceback.format_exc())
+
+    return
+
+
+#
+# Common routine to get the key a drome is stored under in the AIP page
+# data structure. Dromes are stored by code and name together, so the
+# sort order only matters when the output is written.
+#
+def getAipPageKey (dromeCode, dromeName):
+    return dromeCode, dromeName
+
+
+#
+# Common routine to set the drome filter from the command line. Codes are
+# comma separated and may be glob patterns, e.g. EGLL,EGKK or EG*
+#
+def setDromeFilter ( args ):
+    global dromeFilter
+
+    dromeFilter = None
+    if args.only or args.exclude or args.ad_type:
+        dromeFilter = {
+                        "only" : [code.strip().upper() for code in (args.only or "").split(",") if code.strip()],
+                        "exclude" : [code.strip().upper() for code in (args.exclude or "").split(",") if code.strip()],
+                        "types" : {"2" : [adType2], "3" : [adType3], None : [adType2, adType3]}[args.ad_type]
+                      }
+
+    return
+
+
+#
+# Common routine to check if a drome passes the drome filter, so the main
+# page parsers can skip a drome before its page is fetched
+#
+def wantDrome ( adType, dromeCode ):
+    if dromeFilter is None:
+        return True
+
+    dromeCode = dromeCode.upper()
+    if adType not in dromeFilter["types"]:
+        return False
+    if dromeFilter["only"] and not any(fnmatch.fnmatchcase(dromeCode, code) for code in dromeFilter["only"]):
+        return False
+    if any(fnmatch.fnmatchcase(dromeCode, code) for code in dromeFilter["exclude"]):
+        return False
+
+    return True
+
+
+#
+# Common routine to add to the AIP page data structure
+#
+def addAipPage (adType, dromeCode, dromeName, dromeHref, ignoreDups = False):
+    global aipPages
+    key = getAipPageKey(dromeCode, dromeName)
+
+    # check its a known type
+    if adType not in aipPages.keys():
+        logger.info ("    Unknown AD type found [{0}] for [{1}]. Ignoring.".format(adType, key))
+        return False
+
+    if key not in aipPages[adType].keys():
+        dromeStructure = {
+                            "Name" : dromeName,
+                            "Code" : dromeCode,
+                            "PageURL" : dromeHref,
+                            "PageLinks" : {}
+                         }
+        aipPages[adType][key] = dromeStructure
+    else:
+        if not ignoreDups:
+            logger.info ("    Duplicate drome found [{0}] for AD type [{1}]. Ignoring.".format(key, adType))
+        return False
+
+    logger.debug ("    {0} == {1} == {2} == {3}".format(adType, dromeCode, dromeName, dromeHref))
+
+    return True
+
+
+#
+# Common routine to update the page links data in the AIP page data structure
+#
+def updateAipPageLinks (adType, dromeCode, dromeName, dromeLinks):
+    global aipPages
+    key = getAipPageKey(dromeCode, dromeName)
+
+    # check its a known type
+    if adType not in aipPages.keys():
+        logger.info ("    Unknown AD type found [{0}] for [{1}]. Ignoring.".format(adType, key))
+        return
+
+    # dromes filtered out are kept from the existing output
+    if not wantDrome(adType, dromeCode):
+        return
+
+    if key in aipPages[adType].keys():
+        aipPages[adType][key]["PageLinks"] = dromeLinks
+    else:
+        logger.info ("    Unknown drome found [{0}] for AD type [{1}]. Not adding links.".format(key, adType))
+        return
+
+    #logger.debug ("    {0} == {1} == {2} == {3}".format(adType, dromeCode, dromeName, dromeHref))
+
+    return
+
+
+#
+# Common routine to create the JSON output string in the given sort order.
+# If two dromes share the same sort key only the first one found is output.
+#
+def createJsonOutput (aipRegion, sortOrder, currentDTG, currentRelease):
+    # initialise string to hold the JSON text
+    outputString = "{\n\t\"eBagLib\": {\n"
+
+    # add in the schedule information
+    if not isCycleRegion(aipRegion):
+        outputString += "\t\t\"0: Generated - " + currentDTG + "\": {\n"
+    else:
+        outputString += "\t\t\"0: Published - " + currentRelease + "\": {\n"
+
+    if aipRegion == "UK":
+        outputString += "\t\t\t\"10 Year Publishing Schedule\": {\n"
+        outputString += "\t\t\t\t\"url\": \"https://nats-uk.ead-it.com/cms-nats/export/sites/default/en/Publications/publication-schedule/10-year-AIRAC.pdf\",\n"
+        outputString += "\t\t\t\t\"filename\": \"10_Year_AIRAC.pdf\"\n"
+        outputString += "\t\t\t}\n"
+    outputString += "\t\t},\n"
+
+
+    #
+    # loop through all the found airodromes to pull out the PDF links
+    # and then update the JSON output string
+    #
+    for adType in aipPages:
+        if len(aipPages[adType]) == 0:
+            continue
+
+        outputString += "\t\t\"" + adType + "\": {\n"
+
+        # pick out the dromes by their sort key
+        dromes = {}
+        for dromeStructure in aipPages[adType].values():
+            if sortOrder == "NAME":
+                key = dromeStructure["Name"]
+            else:
+                key = dromeStructure["Code"]
+
+            if key not in dromes:
+                dromes[key] = dromeStructure
+            else:
+                logger.info ("    Duplicate [{0}] found [{1}] for AD type [{2}]. Ignoring.".format(sortOrder, key, adType))
+
+        for key in sorted(dromes):
+            dromeStructure = dromes[key]
+            dromeName = dromeStructure["Name"]
+            dromeCode = dromeStructure["Code"]
+            aipPdfPages = dromeStructure["PageLinks"]
+
+            # check if we have any charts for this drome
+            if len(aipPdfPages) > 0:
+                if sortOrder == "NAME":
+                    outputString += "\t\t\t\"" + dromeName + " : " + dromeCode + "\": {\n"
+                else:
+                    outputString += "\t\t\t\"" + dromeCode + " - " + dromeName + "\": {\n"
+
+                # loop through all the PDF links to generate the schema
+                for title in aipPdfPages:
+                    pdf_href, filename = aipPdfPages[title]
+                    outputString += "\t\t\t\t\"" + title + "\": {\n"
+                    outputString += "\t\t\t\t\t\"url\": \"" + pdf_href + "\",\n"
+                    outputString += "\t\t\t\t\t\"filename\": \"" + filename + "\"\n"
+                    outputString += "\t\t\t\t},\n"
+
+                outputString = outputString[:-2]
+                outputString += "\n\t\t\t},\n"
+
+        outputString = outputString[:-2]
+        outputString += "\n\t\t},\n"
+
+    outputString = outputString[:-2]
+    outputString += "\n\t}\n}\n"
+
+    return outputString
+
+
+#
+# Common routine to read the dromes back from a JSON output file written in
+# the given sort order, as a list of (AD type, code, name, links)
+#
+def readJsonOutput (outputFilename, sortOrder):
+    with open(outputFilename, "r", encoding = "utf8") as file:
+        library = json.load(file)["eBagLib"]
+
+    dromes = []
+    for adType, dromeLibrary in library.items():
+        if adType not in aipPages:
+            continue
+
+        for dromeKey, dromeLinks in dromeLibrary.items():
+            if sortOrder == "NAME":
+                dromeName, _, dromeCode = dromeKey.rpartition(" : ")
+            else:
+                dromeCode, _, dromeName = dromeKey.partition(" - ")
+            dromes.append((adType, dromeCode, dromeName, {title : (link["url"], link["filename"]) for title, link in dromeLinks.items()}))
+
+    return dromes
+
+
+#
+# Common routine to merge an existing JSON output file into the AIP page data
+# structure, so a filtered run only replaces the dromes it crawled. Dromes
+# that pass the filter come from this run, everything else is kept.
+#
+def mergeJsonOutput (outputFilename, sortOrder):
+    if not os.path.exists(outputFilename):
+        logger.info ("WARNING - No existing output file {0} to merge into".format(outputFilename))
+        return
+
+    logger.info ("Merging existing output file: {0}".format(outputFilename))
+    try:
+        dromes = readJsonOutput(outputFilename, sortOrder)
+    except Exception as e:
+        logger.fatal ("Unable to merge into {0}, rerun without a drome filter".format(outputFilename))
+        logger.debug (traceback.format_exc())
+        exit(1)
+
+    merged = 0
+    for adType, dromeCode, dromeName, dromeLinks in dromes:
+        if wantDrome(adType, dromeCode):
+            continue
+
+        key = getAipPageKey(dromeCode, dromeName)
+        if key not in aipPages[adType]:
+            aipPages[adType][key] = {
+                                        "Name" : dromeName,
+                                        "Code" : dromeCode,
+                                        "PageURL" : "",
+                                        "PageLinks" : dromeLinks
+                                    }
+            merged += 1
+
+    logger.info ("Kept {0} dromes from the existing output".format(merged))
+
+    return
+
+
+#
+# Common routine to write the JSON output file
+#
+def writeJsonOutput (outputFilename, outputString):
+    logger.info ("Generating output file: {0}".format(outputFilename))
+    try:
+        # write to a temporary file and swap it in, so anything reading the
+        # library never sees a half written file
+        file = open(outputFilename + ".tmp", "w", encoding = "utf8")
+        file.write(outputString)
+        file.close()
+        os.replace(outputFilename + ".tmp", outputFilename)
+    except Exception as e:
+        logger.error (traceback.format_exc())
+        exit(1)
+    emitEvent ("output", file = os.path.abspath(outputFilename))
+
+    return
+
+
+#
+# Common routine to put a URL into a canonical form, so the same document
+# is always requested with the same URL. The fragment is dropped, "." and
+# ".." path segments are resolved, and spaces and other unsafe characters
+# are quoted.
+#
+def canonicalUrl ( pageURL ):
+    parts = urllib.parse.urlsplit(pageURL.strip())
+
+    segments = []
+    for segment in parts.path.split("/"):
+        if segment == "..":
+            if len(segments) > 1:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+    if parts.path.endswith(("/.", "/..")):
+        segments.append("")
+
+    path = urllib.parse.quote("/".join(segments), safe = "/%:@!$&'()*+,;=~")
+    query = urllib.parse.quote(parts.query, safe = "/%:@!$&'()*+,;=~?")
+
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+#
+# Common routine to get the seconds left before the run deadline,
+# None if there is no deadline
+#
+def getTimeRemaining ():
+    if runDeadline is None:
+        return None
+
+    return max(0, runDeadline - time.monotonic())
+
+
+#
+# Common routine to get how long to wait before hedging a request to the
+# page's host, None if we have not seen enough requests to that host
+#
+def getHedgeDelay ( pageURL ):
+    host = urllib.parse.urlsplit(pageURL).netloc
+
+    with hostLatenciesLock:
+        latencies = sorted(hostLatencies.get(host, ()))
+
+    if len(latencies) < hedgeMinSamples:
+        return None
+
+    return latencies[int(0.95 * (len(latencies) - 1))]
+
+
+#
+# Common routine to make a single request for a webpage, with the connect
+# and read timeouts capped by the run deadline, recording how long the
+# host took to answer
+#
+def requestWebPage ( pageURL ):
+    # urllib.request pulls in the http and email packages, so it is only
+    # loaded once there is a page to fetch
+    import urllib.request
+
+    timeRemaining = getTimeRemaining()
+    if timeRemaining == 0:
+        raise TimeoutError("run deadline passed")
+
+    started = time.monotonic()
+    timeout = connectTimeout if timeRemaining is None else min(connectTimeout, timeRemaining)
+    response = urllib.request.urlopen(urllib.request.Request(pageURL, headers={"User-Agent": header_user_agent}), timeout = timeout)
+    with response:
+        # switch the socket over to the read timeout for the body
+        sock = getattr(getattr(response.fp, "raw", None), "_sock", None)
+        if sock is not None:
+            timeRemaining = getTimeRemaining()
+            sock.settimeout(readTimeout if timeRemaining is None else max(0.001, min(readTimeout, timeRemaining)))
+        page = response.read()
+
+    host = urllib.parse.urlsplit(pageURL).netloc
+    with hostLatenciesLock:
+        if host not in hostLatencies:
+            hostLatencies[host] = collections.deque(maxlen = 200)
+        hostLatencies[host].append(time.monotonic() - started)
+
+    return page
+
+
+#
+# Common routine to request a webpage, hedging the request if it is slower
+# than the host normally is and giving up at the run deadline. The first
+# request to answer wins, the other is left to finish in the background.
+#
+def requestWebPageHedged ( pageType, pageName, pageURL ):
+    hedgeDelay = getHedgeDelay(pageURL) if hedgeRequests else None
+    if hedgeDelay is None and runDeadline is None:
+        return requestWebPage ( pageURL )
+
+    results = queue.Queue()
+    def attempt ():
+        try:
+            results.put((None, requestWebPage ( pageURL )))
+        except BaseException as e:
+            results.put((e, None))
+
+    started = 1
+    pending = 1
+    threading.Thread(target=attempt, daemon=True).start()
+    while True:
+        wait = getTimeRemaining()
+        if hedgeDelay is not None and started == 1:
+            wait = hedgeDelay if wait is None else min(wait, hedgeDelay)
+
+        try:
+            error, page = results.get(timeout = wait)
+        except queue.Empty:
+            if hedgeDelay is not None and started == 1 and getTimeRemaining() != 0:
+                logger.info ("    Hedging {0} {1} request after {2:.2f}s".format(pageName, pageType, hedgeDelay))
+                started += 1
+                pending += 1
+                threading.Thread(target=attempt, daemon=True).start()
+                continue
+            raise TimeoutError("run deadline passed")
+
+        if error is None:
+            return page
+        pending -= 1
+        if pending == 0:
+            raise error
+
+
+#
+# Common routine to download the raw bytes of a webpage
+#
+def downloadWebPage ( pageType, pageName, pageURL, sslHack = False ):
+    logger.info ("Parsing {0} {1} main page: {2}".format(pageName, pageType, pageURL))
+
+    try:
+        if sslHack:
+            # main site has broken site certificate, so ignore ssl issues
+            ssl._create_default_https_context = ssl._create_unverified_context
+
+        # open up the main page
+        page = requestWebPageHedged ( pageType, pageName, pageURL )
+    except urllib.error.HTTPError as e:
+        logger.error ("HTTP Error {0}: {1}".format(e.code, e.reason))
+        exit(1)
+    except TimeoutError as e:
+        logger.error ("Timed out getting {0} {1} page {2}: {3}".format(pageName, pageType, pageURL, e))
+        exit(1)
+    except Exception as e:
+        logger.error (traceback.format_exc())
+        exit(1)
+
+    return page
+
+
+#
+# Common routine to get the page cache entry of a webpage, with its raw
+# bytes downloaded. Pages are remembered by their canonical URL until
+# released, and a request for a page that is already being downloaded waits
+# for that download, so a document is only fetched once while it is
+# remembered. The entry is returned rather than looked up again, as the
+# page may be released from the cache at any time.
+#
+def fetchWebPageEntry ( pageType, pageName, pageURL, sslHack = False ):
+    pageURL = canonicalUrl(pageURL)
+
+    with webPagesLock:
+        entry = webPages.get(pageURL)
+        owner = entry is None
+        if owner:
+            entry = {
+                        "done" : threading.Event(),
+                        "lock" : threading.Lock(),
+                        "page" : None,
+                        "html" : None,
+                        "error" : None
+                    }
+            webPages[pageURL] = entry
+
+    if not owner:
+        logger.debug ("    Reusing {0} {1} page: {2}".format(pageName, pageType, pageURL))
+        with traceSpan ("wait " + pageName, "fetch", code = pageName, url = pageURL):
+            entry["done"].wait()
+        if entry["error"] is not None:
+            raise entry["error"]
+        return entry
+
+    try:
+        with traceSpan ("fetch " + pageName, "fetch", code = pageName, url = pageURL):
+            entry["page"] = downloadWebPage ( pageType, pageName, pageURL, sslHack )
+    except BaseException as e:
+        entry["error"] = e
+        raise
+    finally:
+        entry["done"].set()
+
+    return entry
+
+
+#
+# Common routine to get the raw bytes of a webpage, see fetchWebPageEntry
+#
+def fetchWebPage ( pageType, pageName, pageURL, sslHack = False ):
+    return fetchWebPageEntry ( pageType, pageName, pageURL, sslHack )["page"]
+
+
+#
+# Common routine to parse the raw bytes of a webpage
+#
+def parseWebPage ( page ):
+    # BeautifulSoup is the slowest import by far, so it is only loaded once
+    # there is a page to parse
+    from bs4 import BeautifulSoup
+
+    html = BeautifulSoup(page, "html.parser")
+
+    if (html.title):
+        logger.debug ("    TITLE : " + html.title.string)
+    #logger.debug ("    PAGE :\n{0}".format(html))
+
+    return html
+
+
+#
+# Common routine to load a webpage, the parsed page is shared with any
+# other request for the same document
+#
+def getWebPage ( pageType, pageName, pageURL, sslHack = False ):
+    entry = fetchWebPageEntry ( pageType, pageName, pageURL, sslHack )
+
+    with entry["lock"]:
+        if entry["html"] is None:
+            with traceSpan ("parse " + pageName, "parse", code = pageName, url = pageURL):
+                entry["html"] = parseWebPage(entry["page"])
+
+    return entry["html"]
+
+
+#
+# Common routine to drop a page from the page cache. The tree is not
+# disposed of, anyone already holding the page keeps it, and it is freed
+# once they let it go. A later request fetches the page again.
+#
+def releaseWebPage ( pageURL ):
+    with webPagesLock:
+        webPages.pop(canonicalUrl(pageURL), None)
+
+    return
+
+
+#
+# Common routine to empty the page cache
+#
+def releaseWebPages ():
+    with webPagesLock:
+        webPages.clear()
+
+    return
+
+
+#
+# Common routine to get the peak memory of this process and its parse
+# processes in MB, or None if it cannot be measured
+#
+def getPeakMemory ():
+    if resource is None:
+        return None
+
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    return peak / scale
+
+
+#
+# Common routine to log the peak memory in the run summary
+#
+def logPeakMemory ():
+    peakMemory = getPeakMemory()
+    if peakMemory is not None:
+        logger.info ("Peak memory {0:.1f} MB".format(peakMemory))
+
+    return
+
+
+#
+# Common routine to parse drome page bytes with a drome page parser.
+# Used by the parse processes, so only the small PDF links dict is
+# sent back rather than the whole page tree. If dispose is set the tree
+# is taken apart as soon as the links are out, rather than waiting for
+# the garbage collector to find its reference cycles.
+#
+def parseDromePageBytes ( dromeParser, type, code, baseUrl, page, dispose = False ):
+    with traceSpan ("parse " + code, "parse", code = code):
+        html = parseWebPage(page)
+    try:
+        with traceSpan ("extract " + code, "extract", code = code):
+            return dromeParser ( type, code, baseUrl, html )
+    finally:
+        if dispose:
+            html.decompose()
+
+
+#
+# Version of parseDromePageBytes for the parse processes, which returns the
+# seconds the parse took and, if tracing, the trace events recorded in the
+# process along with the links
+#
+def parseDromePageBytesPooled ( region, trace, dromeParser, type, code, baseUrl, page, dispose = False ):
+    global traceEvents
+
+    traceEvents = None
+    if trace:
+        traceEvents = []
+        startTrace (region)
+
+    start = time.perf_counter()
+    pdfPages = parseDromePageBytes ( dromeParser, type, code, baseUrl, page, dispose )
+
+    return pdfPages, time.perf_counter() - start, traceEvents
+
+
+#
+# Common routine to load the crawl costs recorded by earlier runs of a
+# region, a dict of drome code to [fetch seconds, parse seconds]. Costs are
+# kept by drome code rather than URL, as the URLs change every cycle.
+#
+def loadCrawlCosts ( costsFilename ):
+    try:
+        with open(costsFilename, "r", encoding = "utf8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+#
+# Common routine to save the crawl costs measured by this run, averaged
+# with the costs from earlier runs so one slow run does not dominate
+#
+def saveCrawlCosts ( costsFilename, dromeCosts, measuredCosts ):
+    for code, cost in measuredCosts.items():
+        if code in dromeCosts:
+            cost = [round((old + new) / 2, 4) for old, new in zip(dromeCosts[code], cost)]
+        else:
+            cost = [round(new, 4) for new in cost]
+        dromeCosts[code] = cost
+
+    try:
+        with open(costsFilename + ".tmp", "w", encoding = "utf8") as file:
+            json.dump(dromeCosts, file, sort_keys = True)
+        os.replace(costsFilename + ".tmp", costsFilename)
+    except Exception as e:
+        logger.error (traceback.format_exc())
+
+    return
+
+
+#
+# Common routine to predict the cost of a drome page from earlier runs.
+# A drome with no history is given the average cost of those that have one.
+#
+def predictDromeCost ( dromeCosts, code ):
+    if code in dromeCosts:
+        return sum(dromeCosts[code])
+    if dromeCosts:
+        return sum(sum(cost) for cost in dromeCosts.values()) / len(dromeCosts)
+
+    return 0
+
+
+#
+# Common routine to reorder the (seq, drome job) pairs from a main page
+# parser most expensive first, within a window of window jobs. Each job
+# found pushes the most expensive in the window out, so jobs are yielded
+# as the main page is walked rather than once it is done.
+#
+def getCostOrderedJobs ( dromeJobs, dromeCosts, window ):
+    heap = []
+    for seq, dromeJob in dromeJobs:
+        heapq.heappush(heap, (-predictDromeCost(dromeCosts, dromeJob[1]), seq, dromeJob))
+        if len(heap) >= window:
+            cost, seq, dromeJob = heapq.heappop(heap)
+            yield seq, dromeJob
+
+    while heap:
+        cost, seq, dromeJob = heapq.heappop(heap)
+        yield seq, dromeJob
+
+    return
+
+
+#
+# Common routine to predict how long the drome pages take to crawl. The
+# fetches are handed out in the given order to the first free fetch worker,
+# while parsing runs one page at a time on each parse process.
+#
+def predictCrawlSeconds ( dromeCosts, codes, workers, processes ):
+    fetchWorkers = [0.0] * max(1, workers)
+    parseSeconds = 0.0
+    for code in codes:
+        fetch, parse = dromeCosts.get(code, [predictDromeCost(dromeCosts, code) / 2] * 2)
+        heapq.heappush(fetchWorkers, heapq.heappop(fetchWorkers) + fetch)
+        parseSeconds += parse
+
+    return max(max(fetchWorkers), parseSeconds / max(1, processes))
+
+
+#
+# Drome page revalidation. The chart section of each drome page is hashed
+# and kept in AIP <Country>.sections with the links it gave, so the next run
+# only parses the drome pages whose chart section changed. The page URLs
+# change every cycle, so the last cycle's URLs are moved onto the new base
+# URL, and a drome whose page is not at its moved URL is always parsed.
+#
+# Plugins that can find the chart section without parsing the page provide
+# getDromeSection, see aip/regions/__init__.py.
+#
+divTagPattern = re.compile(rb"<(/?)div\b", re.IGNORECASE)
+
+
+#
+# Common routine to get the bytes of the div that starts at start in a
+# page, nested divs and all
+#
+def getDivBytes ( page, start ):
+    depth = 0
+    for match in divTagPattern.finditer(page, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            end = page.find(b">", match.end())
+            return page[start:end + 1 if end >= 0 else len(page)]
+
+    return page[start:]
+
+
+#
+# Common routine to get a fingerprint of the drome page parser, so the
+# chart sections hashed by an earlier version of it are not trusted
+#
+def getParserVersion ( regionPlugin ):
+    dromeParser = getattr(regionPlugin.parseDromePage, "func", regionPlugin.parseDromePage)
+    digest = hashlib.sha256()
+    for filename in sorted({regionPlugin.__file__, sys.modules[dromeParser.__module__].__file__}):
+        with open(filename, "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+#
+# Common routine to load the chart sections kept by the last run, a dict of
+# (AD type, code) to the drome's base URL, page URL, section hash and links
+#
+def loadDromeSections ( sectionsFilename, parserVersion ):
+    try:
+        with open(sectionsFilename, "r", encoding = "utf8") as file:
+            sections = json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+    if sections.get("parser") != parserVersion:
+        logger.info ("Drome page parser changed since {0} was written, parsing every drome page".format(sectionsFilename))
+        return {}
+
+    return {(entry["type"], entry["code"]) : entry for entry in sections["dromes"]}
+
+
+#
+# Common routine to save the chart sections hashed by this run, along with
+# the links of each drome. Dromes not crawled this run, say because of a
+# drome filter, are kept from the last run while they are still listed.
+#
+def saveDromeSections ( sectionsFilename, parserVersion, lastSections, sectionHashes ):
+    dromes = []
+    for adType in aipPages:
+        for dromeStructure in aipPages[adType].values():
+            key = (adType, dromeStructure["Code"])
+            if key in sectionHashes:
+                digest, baseUrl = sectionHashes[key]
+                dromes.append({
+                                "type" : adType,
+                                "code" : dromeStructure["Code"],
+                                "base" : baseUrl,
+                                "url" : dromeStructure["PageURL"],
+                                "hash" : digest,
+                                "links" : dromeStructure["PageLinks"]
+                              })
+            elif key in lastSections:
+                dromes.append(lastSections[key])
+
+    try:
+        with open(sectionsFilename + ".tmp", "w", encoding = "utf8") as file:
+            json.dump({ "parser" : parserVersion, "dromes" : dromes }, file)
+        os.replace(sectionsFilename + ".tmp", sectionsFilename)
+    except Exception as e:
+        logger.info ("WARNING - Unable to save the drome page sections to {0}".format(sectionsFilename))
+        logger.debug (traceback.format_exc())
+
+    return
+
+
+#
+# Common routine to check a drome page's chart section against the last
+# run. The hash of the section is recorded, and if it is unchanged the last
+# run's links are returned moved onto the new base URL, else None to parse
+# the page.
+#
+def revalidateDromePage ( lastSections, sectionHashes, type, code, baseUrl, dromeUrl, section ):
+    if section is None:
+        return None
+
+    digest = hashlib.sha256(section).hexdigest()
+    sectionHashes[(type, code)] = digest, baseUrl
+
+    entry = lastSections.get((type, code))
+    if entry is None or entry["hash"] != digest:
+        return None
+
+    # the drome page has to be where the last cycle's page moves to
+    oldBase = entry["base"]
+    if not entry["url"].startswith(oldBase) or baseUrl + entry["url"][len(oldBase):] != dromeUrl:
+        return None
+
+    pdfPages = {}
+    for title, (pdfUrl, filename) in entry["links"].items():
+        if pdfUrl.startswith(oldBase):
+            pdfUrl = baseUrl + pdfUrl[len(oldBase):]
+        pdfPages[title] = pdfUrl, filename
+
+    return pdfPages
+
+
+#
+# Common routine to open the crawl journal, an append only file with one
+# JSON line per drome holding its extracted links. The first line records
+# the region and release, so a journal is only resumed by the same run.
+# Returns the journal file and, if resuming, the dromes already done.
+#
+def openCrawlJournal ( journalFilename, aipRegion, currentRelease, resume ):
+    header = { "region" : aipRegion, "release" : currentRelease }
+    resumedDromes = {}
+
+    if resume and os.path.exists(journalFilename):
+        with open(journalFilename, "r", encoding = "utf8") as file:
+            lines = file.read().splitlines()
+
+        try:
+            journalHeader = json.loads(lines[0]) if lines else None
+        except ValueError:
+            journalHeader = None
+
+        if journalHeader == header:
+            for line in lines[1:]:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut short when the last run died
+                    continue
+                pdfPages = dict((title, tuple(link)) for title, link in entry["links"].items())
+                resumedDromes[(entry["type"], entry["code"], entry["name"])] = pdfPages
+            logger.info ("Resuming {0} dromes from journal: {1}".format(len(resumedDromes), journalFilename))
+
+            journal = open(journalFilename, "a", encoding = "utf8")
+            return journal, resumedDromes
+
+        logger.info ("Journal {0} is for a different run, starting from scratch".format(journalFilename))
+
+    journal = open(journalFilename, "w", encoding = "utf8")
+    journal.write(json.dumps(header) + "\n")
+    journal.flush()
+
+    return journal, resumedDromes
+
+
+#
+# Common routine to add a completed drome to the crawl journal
+#
+def writeCrawlJournal ( journal, dromeJob, pdfPages ):
+    type, code, name, baseUrl, dromeUrl = dromeJob
+    entry = {
+                "type" : type,
+                "code" : code,
+                "name" : name,
+                "url" : dromeUrl,
+                "links" : pdfPages
+            }
+    journal.write(json.dumps(entry) + "\n")
+    journal.flush()
+
+    return
+
+
+#
+# Common routine to crawl the drome pages yielded by a main page parser.
+#
+# Drome jobs flow through a pipeline of stages joined by bounded queues:
+#   discovery (main page parser) -> fetch (worker threads) -> parse -> store
+# so drome pages are fetched while the main page is still being walked.
+# The bounded queues give backpressure, and the store stage applies the
+# results in the order the dromes were discovered. A drome page is dropped
+# from the page cache once it is fetched, so the run does not hold every
+# drome page, while jobs for the same page at the same time still share
+# one download.
+#
+# If a process pool is given the parse stage hands the page bytes to it,
+# so parsing is spread over every core instead of sharing the GIL with
+# the fetch threads.
+# If a journal is given each drome's links are written to it as soon as
+# they are extracted, and dromes found in resumedDromes (from a journal
+# replayed with --resume) are stored without being fetched again. After a
+# failure no more jobs are taken from the main page parser, but the jobs
+# already queued are still crawled and journalled before it is raised.
+#
+# If dromeCosts from earlier runs is given, the dromes are fetched most
+# expensive first so the long pages are not left to the end of the run.
+# Only the next costWindow dromes found are sorted, so fetching still
+# starts while the main page is walked. The links are still stored in
+# discovery order. The fetch and parse seconds of
+# each drome are added to measuredCosts if it is given.
+#
+# If maxPages or maxBytes is given the crawl is memory bounded. No more
+# than maxPages drome pages, or maxBytes of page data, are held between
+# being fetched and their links stored, and each tree is disposed of once
+# its links are extracted.
+#
+# A canary crawl only logs how many drome pages it crawled, the full crawl
+# after it reports the run's totals.
+#
+def crawlDromePages ( dromeJobs, dromeParser, workers = 4, queueSize = 32, pool = None, journal = None, resumedDromes = None, maxPages = 0, maxBytes = 0, dromeCosts = None, measuredCosts = None, sectionParser = None, lastSections = None, sectionHashes = None, sectionOnly = False, canary = False ):
+    fetchQueue = queue.Queue(queueSize)
+    parseQueue = queue.Queue(queueSize)
+    storeQueue = queue.Queue(queueSize)
+    failures = []
+    revalidated = []
+    bounded = bool(maxPages or maxBytes)
+
+    # pages and bytes in flight, a fetch waits while either is over its cap.
+    # One page is always let through so a page bigger than maxBytes still goes
+    inFlight = { "pages" : 0, "bytes" : 0, "peakPages" : 0, "peakBytes" : 0 }
+    inFlightChanged = threading.Condition()
+
+    def acquireInFlight ():
+        with inFlightChanged:
+            while inFlight["pages"] and ((maxPages and inFlight["pages"] >= maxPages) or (maxBytes and inFlight["bytes"] >= maxBytes)):
+                inFlightChanged.wait()
+            inFlight["pages"] += 1
+            inFlight["peakPages"] = max(inFlight["peakPages"], inFlight["pages"])
+
+    def addInFlightBytes ( size ):
+        with inFlightChanged:
+            inFlight["bytes"] += size
+            inFlight["peakBytes"] = max(inFlight["peakBytes"], inFlight["bytes"])
+
+    def releaseInFlight ( size ):
+        with inFlightChanged:
+            inFlight["pages"] -= 1
+            inFlight["bytes"] -= size
+            inFlightChanged.notify_all()
+
+    # fetch stage, download the drome page bytes
+    def fetchStage ():
+        while True:
+            job = fetchQueue.get()
+            if job is None:
+                parseQueue.put(None)
+                return
+
+            seq, (type, code, name, baseUrl, dromeUrl) = job
+            page = None
+            size = 0
+            if bounded:
+                acquireInFlight ()
+            start = time.perf_counter()
+            # after a failure discovery stops handing out jobs, but the
+            # jobs already queued are still crawled, so they are journalled
+            # and a resumed run does not crawl them again
+            try:
+                # the page only lives as long as this job, a job waiting
+                # on the same download already has it, so only the main
+                # and menu pages stay in the page cache
+                try:
+                    page = fetchWebPage ( "Drome",  code, dromeUrl )
+                finally:
+                    releaseWebPage (dromeUrl)
+                if bounded:
+                    size = len(page)
+                    addInFlightBytes (size)
+            except BaseException as e:
+                failures.append(e)
+            parseQueue.put((seq, job[1], page, size, time.perf_counter() - start))
+
+    # parse stage, build the tree and pull out the PDF links
+    def parseStage ():
+        running = workers
+        while running:
+            job = parseQueue.get()
+            if job is None:
+                running -= 1
+                continue
+
+            seq, (type, code, name, baseUrl, dromeUrl), page, size, fetchSeconds = job
+            pdfPages = None
+            parseSeconds = 0
+            if page is not None:
+                try:
+                    # a drome whose chart section is unchanged since the
+                    # last run reuses its links rather than being parsed
+                    section = None
+                    if sectionParser:
+                        start = time.perf_counter()
+                        section = sectionParser ( type, code, page )
+                        pdfPages = revalidateDromePage ( lastSections or {}, sectionHashes, type, code, baseUrl, dromeUrl, section )
+                        parseSeconds = time.perf_counter() - start
+                    if sectionOnly:
+                        # the parser only reads the chart section, so only
+                        # it is parsed, and a page without one has no charts
+                        page = section
+                    if pdfPages is not None:
+                        revalidated.append(code)
+                    elif sectionOnly and section is None:
+                        pdfPages = {}
+                    elif pool:
+                        pdfPages = pool.submit(parseDromePageBytesPooled, traceRegion, traceEvents is not None, dromeParser, type, code, baseUrl, page, bounded)
+                    else:
+                        start = time.perf_counter()
+                        pdfPages = parseDromePageBytes ( dromeParser, type, code, baseUrl, page, bounded )
+                        parseSeconds = time.perf_counter() - start
+                except BaseException as e:
+                    failures.append(e)
+            page = None
+
+            # a page sent to a parse process is in flight until its links
+            # come back, so the store stage releases it
+            if bounded and not isinstance(pdfPages, concurrent.futures.Future):
+                releaseInFlight (size)
+                size = None
+            storeQueue.put((seq, job[1], pdfPages, False, size, [fetchSeconds, parseSeconds]))
+        storeQueue.put(None)
+
+    # store stage, add the links to the page structure in discovery order
+    def storeStage ():
+        pending = {}
+        nextSeq = 0
+        while True:
+            job = storeQueue.get()
+            if job is None:
+                return
+
+            seq, dromeJob, pdfPages, resumed, size, cost = job
+            if isinstance(pdfPages, concurrent.futures.Future):
+                # wait for the parse process, the bounded store queue
+                # limits how many pages are with the pool at once
+                try:
+                    pdfPages, cost[1], events = pdfPages.result()
+                    if events:
+                        with traceEventsLock:
+                            traceEvents.extend(events)
+                except BaseException as e:
+                    failures.append(e)
+                    pdfPages = None
+                if bounded:
+                    releaseInFlight (size)
+
+            if measuredCosts is not None and pdfPages is not None and not resumed:
+                measuredCosts[dromeJob[1]] = cost
+
+            # journal the drome straight away, so it survives a later failure
+            if journal and pdfPages is not None and not resumed:
+                try:
+                    writeCrawlJournal (journal, dromeJob, pdfPages)
+                except BaseException as e:
+                    failures.append(e)
+            pending[seq] = dromeJob, pdfPages
+            while nextSeq in pending:
+                (type, code, name, baseUrl, dromeUrl), pdfPages = pending.pop(nextSeq)
+                if pdfPages is not None:
+                    updateAipPageLinks (type, code, name, pdfPages)
+                    emitEvent ("drome", type = type, code = code, name = name, charts = len(pdfPages))
+                nextSeq += 1
+
+    stages = [threading.Thread(target=fetchStage, name="fetch-{0}".format(i + 1), daemon=True) for i in range(workers)]
+    stages.append(threading.Thread(target=parseStage, name="parse", daemon=True))
+    stages.append(threading.Thread(target=storeStage, name="store", daemon=True))
+    for stage in stages:
+        stage.start()
+
+    # discovery stage, the bounded queue holds the main page parser back
+    # when the fetch stage falls behind. With costs from earlier runs the
+    # dromes are sorted within a window of the next ones found
+    dromeJobs = enumerate(dromeJobs or [])
+    if dromeCosts:
+        dromeJobs = getCostOrderedJobs (dromeJobs, dromeCosts, costWindow)
+    crawled = 0
+    resumed = 0
+    try:
+        for seq, dromeJob in dromeJobs:
+            if failures:
+                break
+            type, code, name, baseUrl, dromeUrl = dromeJob
+            if resumedDromes and (type, code, name) in resumedDromes:
+                storeQueue.put((seq, dromeJob, resumedDromes[(type, code, name)], True, None, None))
+                resumed += 1
+            else:
+                fetchQueue.put((seq, dromeJob))
+            crawled += 1
+    finally:
+        for i in range(workers):
+            fetchQueue.put(None)
+        for stage in stages:
+            stage.join()
+
+    if failures:
+        raise failures[0]
+
+    if canary:
+        logger.info ("Canary crawled {0} drome pages".format(crawled))
+        return
+
+    logger.info ("Crawled {0} drome pages, {1} of them resumed from the journal".format(crawled, resumed))
+    if sectionParser:
+        logger.info ("{0} drome pages were unchanged since the last run and were not parsed".format(len(revalidated)))
+    emitEvent ("crawled", dromes = crawled, resumed = resumed, unchanged = len(revalidated))
+    if bounded:
+        logger.info ("At most {0} drome pages, {1:.1f} MB, were in flight at once".format(inFlight["peakPages"], inFlight["peakBytes"] / (1024 * 1024)))
+
+    return
+
+
+#
+# Common routine to open the shared work queue, a SQLite file that the
+# coordinator and any number of workers, on this host or others mounting
+# the same directory, use to hand out drome page jobs.
+#
+# A job is pending until a worker claims it, which gives the worker a lease.
+# A job whose lease runs out, say because its worker died, can be claimed
+# again, and one that fails queueAttempts times fails the coordinator's run.
+#
+def openWorkQueue ( queueFilename ):
+    connection = sqlite3.connect(queueFilename, timeout = 60, isolation_level = None)
+    connection.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                            id INTEGER PRIMARY KEY,
+                            run TEXT, seq INTEGER, region TEXT,
+                            type TEXT, code TEXT, name TEXT, baseUrl TEXT, dromeUrl TEXT,
+                            state TEXT DEFAULT 'pending', worker TEXT, leaseUntil REAL DEFAULT 0,
+                            attempts INTEGER DEFAULT 0, result TEXT, error TEXT)""")
+    connection.execute("CREATE INDEX IF NOT EXISTS jobsState ON jobs (state, leaseUntil)")
+    connection.execute("CREATE INDEX IF NOT EXISTS jobsRun ON jobs (run, seq)")
+
+    return connection
+
+
+#
+# Common routine to load the plugin for a region, see aip/regions/__init__.py.
+# Plugins are only imported when a region is generated, so a run only loads
+# the code of the region it needs.
+#
+def getRegionPlugin ( aipRegion ):
+    try:
+        return importlib.import_module("aip.regions." + aipRegion.lower())
+    except ImportError:
+        logger.fatal ("Unable to load the plugin for region {0}".format(aipRegion))
+        logger.debug (traceback.format_exc())
+        exit(1)
+
+
+#
+# Common routine to find the regions that can be generated, one for each
+# two letter plugin module in aip/regions. Only the folder is listed, no
+# plugin is loaded.
+#
+def getRegions ():
+    regionsPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regions")
+
+    return sorted(filename[:-3].upper() for filename in os.listdir(regionsPath) if len(filename) == 5 and filename.endswith(".py"))
+
+
+#
+# Common routine to check if a region's AIP is published per AIRAC cycle,
+# the others only publish the live AIP
+#
+def isCycleRegion ( aipRegion ):
+    return getattr(getRegionPlugin(aipRegion), "perCycle", False)
+
+
+#
+# Coordinator version of crawlDromePages. The drome jobs yielded by a main
+# page parser are put on the work queue for the workers. Each drome is
+# journalled and taken off the queue as soon as it is done, so an
+# interrupted coordinator can be resumed, and once every job is done the
+# links are stored in the order the dromes were discovered.
+#
+def crawlDromePagesQueued ( queueFilename, aipRegion, dromeJobs, journal = None, resumedDromes = None, pollSeconds = 0.5 ):
+    connection = openWorkQueue (queueFilename)
+    run = "{0} {1} {2} {3}".format(aipRegion, socket.gethostname(), os.getpid(), time.time())
+
+    results = {}
+    seq = 0
+    queued = 0
+    batch = []
+    done = 0
+    try:
+        # expand the main page into jobs, the dromes already in the journal are
+        # stored straight away. The jobs are queued in batches as the main page
+        # is walked, so the workers can start on them and the queue is only
+        # locked while each batch is written
+        for dromeJob in itertools.chain(dromeJobs or [], [None]):
+            if dromeJob is not None:
+                type, code, name, baseUrl, dromeUrl = dromeJob
+                if resumedDromes and (type, code, name) in resumedDromes:
+                    results[seq] = dromeJob, resumedDromes[(type, code, name)]
+                else:
+                    batch.append((run, seq, aipRegion, type, code, name, baseUrl, dromeUrl))
+                seq += 1
+            if batch and (dromeJob is None or len(batch) >= queueBatchSize):
+                connection.execute("BEGIN IMMEDIATE")
+                connection.executemany("INSERT INTO jobs (run, seq, region, type, code, name, baseUrl, dromeUrl) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                connection.execute("COMMIT")
+                queued += len(batch)
+                batch = []
+        logger.info ("Queued {0} drome pages for the workers in {1}".format(queued, queueFilename))
+
+        # wait for the workers to finish every job, journalling each drome as
+        # it is done
+        while True:
+            rows = connection.execute("SELECT id, seq, type, code, name, baseUrl, dromeUrl, result FROM jobs WHERE run = ? AND state = 'done'", (run,)).fetchall()
+            for row in rows:
+                pdfPages = dict((title, tuple(link)) for title, link in json.loads(row[7]).items())
+                results[row[1]] = tuple(row[2:7]), pdfPages
+                if journal:
+                    writeCrawlJournal (journal, tuple(row[2:7]), pdfPages)
+            # the done jobs are kept in results, so are no longer needed on the queue
+            connection.executemany("DELETE FROM jobs WHERE id = ?", [(row[0],) for row in rows])
+            done += len(rows)
+            if done == queued:
+                break
+
+            error = connection.execute("SELECT code, error FROM jobs WHERE run = ? AND state = 'failed'", (run,)).fetchone()
+            if error is not None:
+                logger.error ("Drome {0} failed on every worker: {1}".format(error[0], error[1]))
+                exit(1)
+            remaining = getTimeRemaining()
+            if remaining is not None and remaining <= 0:
+                logger.error ("Run deadline passed with {0} drome pages still queued".format(queued - done))
+                exit(1)
+            logger.debug ("    Waiting on {0} drome pages".format(queued - done))
+            time.sleep(pollSeconds)
+    finally:
+        # the run is over one way or another, so its jobs are no longer needed
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        connection.execute("DELETE FROM jobs WHERE run = ?", (run,))
+        connection.close()
+
+    for index in sorted(results):
+        (type, code, name, baseUrl, dromeUrl), pdfPages = results[index]
+        updateAipPageLinks (type, code, name, pdfPages)
+        emitEvent ("drome", type = type, code = code, name = name, charts = len(pdfPages))
+
+    logger.info ("Crawled {0} drome pages, {1} of them resumed from the journal".format(seq, seq - queued))
+    emitEvent ("crawled", dromes = seq, resumed = seq - queued, unchanged = 0)
+
+    return
+
+
+#
+# Common routine to run a queue worker, claiming drome jobs from the work
+# queue, fetching and parsing their pages and sending back the links.
+# The worker stops once the queue has been empty for idleSeconds.
+#
+def runQueueWorker ( queueFilename, leaseSeconds, idleSeconds, attempts = 3, pollSeconds = 0.5 ):
+    connection = openWorkQueue (queueFilename)
+    worker = "{0} {1}".format(socket.gethostname(), os.getpid())
+    logger.info ("Worker [{0}] taking jobs from {1}".format(worker, queueFilename))
+
+    done = 0
+    idleSince = time.monotonic()
+    while time.monotonic() - idleSince < idleSeconds:
+        # claim the oldest job that is pending or whose lease has run out
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        job = connection.execute("""SELECT id, region, type, code, baseUrl, dromeUrl, attempts FROM jobs
+                                    WHERE state = 'pending' OR (state = 'claimed' AND leaseUntil < ?)
+                                    ORDER BY id LIMIT 1""", (now,)).fetchone()
+        if job is not None:
+            connection.execute("UPDATE jobs SET state = 'claimed', worker = ?, leaseUntil = ?, attempts = attempts + 1 WHERE id = ?",
+                               (worker, now + leaseSeconds, job[0]))
+        connection.execute("COMMIT")
+
+        if job is None:
+            time.sleep(pollSeconds)
+            continue
+
+        id, aipRegion, type, code, baseUrl, dromeUrl, tries = job
+        try:
+            # the page is not kept, so a retry of a failed job fetches again
+            try:
+                page = fetchWebPage ( "Drome", code, dromeUrl )
+            finally:
+                releaseWebPage (dromeUrl)
+            pdfPages = parseDromePageBytes ( getRegionPlugin(aipRegion).parseDromePage, type, code, baseUrl, page, True )
+            connection.execute("UPDATE jobs SET state = 'done', result = ? WHERE id = ? AND worker = ?", (json.dumps(pdfPages), id, worker))
+            done += 1
+        except (Exception, SystemExit) as e:
+            # give the job back, or fail it if it has had all its tries
+            state = "failed" if tries + 1 >= attempts else "pending"
+            logger.error ("Drome {0} failed, marked {1}".format(code, state))
+            connection.execute("UPDATE jobs SET state = ?, error = ? WHERE id = ? AND worker = ?", (state, repr(e), id, worker))
+        idleSince = time.monotonic()
+
+    connection.close()
+    logger.info ("Worker [{0}] idle for {1} seconds, stopping after {2} drome pages".format(worker, idleSeconds, done))
+
+    return
+
+
+#
+# Common routine to find the AIRAC cycle to generate in the schedule table.
+# cycle is one of "current", "previous", "next" or an AIRAC number like
+# "AIRAC 11/2026" or "11/2026". Returns the index into effectiveDates,
+# None if there is no such cycle.
+#
+def getAiracCycle ( cycle, currentDTG ):
+    # the current cycle is the last one to have become effective
+    currentIndex = None
+    for index, dateLine in enumerate(effectiveDates):
+        if ( currentDTG < dateLine[3] ):
+            break
+        currentIndex = index
+
+    if cycle in ("current", "previous", "next"):
+        if currentIndex is None:
+            return None
+        index = currentIndex + { "current" : 0, "previous" : -1, "next" : 1 }[cycle]
+        if index < 0 or index >= len(effectiveDates):
+            return None
+        return index
+
+    airac = cycle.strip().upper()
+    if not airac.startswith("AIRAC "):
+        airac = "AIRAC " + airac
+    for index, dateLine in enumerate(effectiveDates):
+        if dateLine[0] == airac:
+            return index
+
+    return None
+
+
+#
+# Common routine to get the dates of an AIRAC cycle the region plugins build
+# their base URL from, the effective "release" date, the "published" date
+# and the "offset" of the cycle in the schedule table
+#
+def getCycleDates ( cycleIndex ):
+    return { "release" : effectiveDates[cycleIndex][3], "published" : effectiveDates[cycleIndex][2], "offset" : cycleIndex + 2 }
+
+
+#
+# Common routine to get the output filename for a region, dated if the
+# cycle is not effective yet and tagged with the sort order if more than
+# one sort order is being written
+#
+def getOutputFilename ( aipRegionName, extension, datedRelease = None, sortOrder = None ):
+    outputFilename = "AIP {0}".format(aipRegionName)
+    if datedRelease:
+        outputFilename += " {0}".format(datedRelease)
+    if sortOrder:
+        outputFilename += " - {0}".format(sortOrder)
+
+    return outputFilename + extension
+
+
+#
+# Common routine to swap a cycle's libraries in on its effective date. Each
+# dated file the cycle was generated to ahead of time is renamed onto the
+# undated name of the file in use, and the chart index is updated from the
+# new library. Does nothing if the cycle has no dated files.
+#
+def swapInCycle ( aipRegion, cycleIndex, outputOrders, indexFilename ):
+    aipRegionName = getRegionPlugin(aipRegion).regionName
+    currentRelease = effectiveDates[cycleIndex][3]
+    datedPrefix = getOutputFilename(aipRegionName, "", currentRelease)
+    undatedPrefix = getOutputFilename(aipRegionName, "")
+
+    swapped = 0
+    for filename in sorted(os.listdir(".")):
+        if filename.startswith(datedPrefix) and filename.endswith((".json", ".catalog", ".costs", ".sections")):
+            os.replace(filename, undatedPrefix + filename[len(datedPrefix):])
+            logger.info ("Swapped in {0} as {1}".format(filename, undatedPrefix + filename[len(datedPrefix):]))
+            swapped += 1
+    if not swapped:
+        return
+
+    # the index is of the libraries in use, so it moves on with them
+    sortOrder = outputOrders[0]
+    libraryFilename = getOutputFilename(aipRegionName, ".json", None, sortOrder if len(outputOrders) > 1 else None)
+    for adType in aipPages:
+        aipPages[adType].clear()
+    try:
+        for adType, dromeCode, dromeName, dromeLinks in readJsonOutput(libraryFilename, sortOrder):
+            aipPages[adType][getAipPageKey(dromeCode, dromeName)] = {
+                                                                        "Name" : dromeName,
+                                                                        "Code" : dromeCode,
+                                                                        "PageURL" : "",
+                                                                        "PageLinks" : dromeLinks
+                                                                    }
+        indexRegion (indexFilename, aipRegion, currentRelease)
+    except Exception as e:
+        logger.error ("Unable to index {0}, the index is updated by the next run".format(libraryFilename))
+        logger.debug (traceback.format_exc())
+
+    return
+
+
+#
+# Scheduler mode, runs forever generating each upcoming AIRAC cycle's library
+# as soon as the cycle is published, weeks before it becomes effective. Each cycle
+# is generated by running this script again for that cycle, with the same
+# arguments, to dated files, and failed runs are retried at the next check.
+# On each cycle's effective date its dated files are swapped in for the
+# libraries in use.
+#
+def runScheduler ( argv, checkHours, aipRegion, outputOrders, indexFilename ):
+    # pass on the command line without the scheduler, cycle and log arguments
+    childArgs = []
+    skipNext = False
+    for arg in argv:
+        if skipNext:
+            skipNext = False
+        elif arg in ("--schedule", "--previous", "--serve"):
+            continue
+        elif arg in ("--cycle", "--schedule-hours", "--serve-host", "--serve-port", "--log"):
+            skipNext = True
+        elif arg.startswith(("--cycle=", "--schedule-hours=", "--serve-host=", "--serve-port=", "--log=")):
+            continue
+        else:
+            childArgs.append(arg)
+
+    generated = set()
+    while True:
+        currentDTG = datetime.datetime.now().strftime("%Y-%m-%d")
+        currentIndex = getAiracCycle ("current", currentDTG)
+        if currentIndex is None:
+            logger.fatal ("No current AIRAC cycle in the schedule table for [{0}]".format(currentDTG))
+            exit(1)
+
+        # the current cycle may have been generated before it became effective
+        swapInCycle (aipRegion, currentIndex, outputOrders, indexFilename)
+
+        # generate every upcoming cycle that has been published
+        nextPublished = None
+        for index in range(currentIndex + 1, len(effectiveDates)):
+            airac, cutoffDate, publishedDate, effectiveDate = effectiveDates[index]
+            if currentDTG < publishedDate:
+                nextPublished = datetime.datetime.strptime(publishedDate, "%Y-%m-%d")
+                break
+            if index in generated:
+                continue
+
+            # each run has its own log, so it does not replace the scheduler's
+            logger.info ("Generating {0} published [{1}] effective [{2}]".format(airac, publishedDate, effectiveDate))
+            result = subprocess.run([sys.executable, os.path.abspath(sys.argv[0])] + childArgs + ["--cycle", airac, "--log", "aipParser {0}.log".format(effectiveDate)])
+            if result.returncode == 0:
+                generated.add(index)
+            else:
+                logger.error ("Generating {0} failed, will retry".format(airac))
+
+        # sleep until the next check, or the next cycle is published or
+        # becomes effective if sooner
+        wakeTime = datetime.datetime.now() + datetime.timedelta(hours = checkHours)
+        if nextPublished is not None:
+            wakeTime = min(wakeTime, nextPublished)
+        if currentIndex + 1 < len(effectiveDates):
+            wakeTime = min(wakeTime, datetime.datetime.strptime(effectiveDates[currentIndex + 1][3], "%Y-%m-%d"))
+        logger.info ("Scheduler sleeping until [{0}]".format(wakeTime.strftime("%Y-%m-%d %H:%M")))
+        time.sleep(max(0, (wakeTime - datetime.datetime.now()).total_seconds()))
+
+
+#
+# Common routine to get a library to serve. Each library is read, hashed and
+# compressed once when it changes, and the cached copy swapped in whole, so
+# requests always see one complete version of the file.
+#
+def getServedLibrary ( filename ):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    with servedLibrariesLock:
+        library = servedLibraries.get(filename)
+    if library is not None and library["mtime"] == stat.st_mtime_ns and library["size"] == stat.st_size:
+        return library
+
+    with open(filename, "rb") as file:
+        body = file.read()
+    library = {
+                "mtime" : stat.st_mtime_ns,
+                "size" : len(body),
+                "etag" : hashlib.sha256(body).hexdigest()[:32],
+                "body" : body,
+                "gzip" : gzip.compress(body, 9)
+              }
+    logger.info ("Serving {0} [{1}] {2} bytes, {3} compressed".format(filename, library["etag"], len(body), len(library["gzip"])))
+
+    with servedLibrariesLock:
+        servedLibraries[filename] = library
+
+    return library
+
+
+#
+# Common routine to check if a client's Accept-Encoding header asks for
+# gzip. Each coding has a q-value, 1 if not given, and 0 turns it down.
+# gzip is sent if its q-value, or that of *, is above 0 and not below the
+# q-value of identity, which only counts if it is given, itself or as *.
+#
+def acceptsGzip ( acceptEncoding ):
+    qValues = {}
+    for coding in acceptEncoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        qValues[name] = q
+
+    gzipQ = qValues.get("gzip", qValues.get("x-gzip", qValues.get("*", 0.0)))
+    identityQ = qValues.get("identity", qValues.get("*", 0.0))
+
+    return gzipQ > 0 and gzipQ >= identityQ
+
+
+#
+# HTTP handler for serve mode, publishes the JSON libraries in the current
+# directory with strong ETags and gzip compression
+#
+def sendLibrary ( handler, sendBody ):
+    # only serve JSON files from the current directory
+    filename = urllib.parse.unquote(urllib.parse.urlsplit(handler.path).path).lstrip("/")
+    library = None
+    if filename.endswith(".json") and os.path.basename(filename) == filename:
+        library = getServedLibrary (filename)
+    if library is None:
+        handler.send_error(404)
+        return
+
+    # each encoding is its own representation, so has its own strong ETag
+    useGzip = acceptsGzip (handler.headers.get("Accept-Encoding", ""))
+    etag = '"{0}{1}"'.format(library["etag"], "-gzip" if useGzip else "")
+    ifNoneMatch = [tag.strip() for tag in handler.headers.get("If-None-Match", "").split(",")]
+    if etag in ifNoneMatch or "*" in ifNoneMatch:
+        handler.send_response(304)
+        handler.send_header("ETag", etag)
+        handler.send_header("Vary", "Accept-Encoding")
+        handler.end_headers()
+        return
+
+    body = library["gzip"] if useGzip else library["body"]
+    handler.send_response(200)
+    handler.send_header("Content-Type", "application/json; charset=utf-8")
+    handler.send_header("Content-Length", str(len(body)))
+    handler.send_header("ETag", etag)
+    handler.send_header("Vary", "Accept-Encoding")
+    handler.send_header("Cache-Control", "no-cache")
+    if useGzip:
+        handler.send_header("Content-Encoding", "gzip")
+    handler.end_headers()
+    if sendBody:
+        handler.wfile.write(body)
+
+    return
+
+
+#
+# Common routine to start serve mode in the background
+#
+def startServer ( host, port ):
+    # http.server is only needed in serve mode, so it is loaded here
+    import http.server
+
+    handler = type("LibraryRequestHandler", (http.server.BaseHTTPRequestHandler,), {
+                    "do_HEAD" : lambda self: sendLibrary(self, False),
+                    "do_GET" : lambda self: sendLibrary(self, True),
+                    "log_message" : lambda self, format, *args: logger.debug ("Serve {0} - {1}".format(self.address_string(), format % args))
+                  })
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    logger.info ("Serving libraries from {0} on http://{1}:{2}/".format(os.getcwd(), host, port))
+
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+
+    return server
+
+
+#
+# Chart index, an inverted index over the chart titles, aerodrome names and
+# codes of every region, kept in a SQLite file so a search only reads the
+# few index pages it needs rather than the JSON libraries.
+#
+# Text is lower cased and split into words, with letters and numbers split
+# apart so RWY27L is found by "rwy 27" as well as "rwy 27l". A search word
+# also matches the abbreviations the chart titles use for it.
+#
+chartIndexWordPattern = re.compile(r"[a-z]+|[0-9]+[a-z]?")
+chartIndexStopWords = { "a", "an", "and", "for", "in", "of", "on", "the", "to" }
+chartIndexSynonyms = { "runway" : ("rwy",), "approach" : ("apch", "iac"), "ground" : ("gnd",), "aerodrome" : ("ad",), "heliport" : ("hel",) }
+
+
+#
+# Common routine to split text into index terms
+#
+def getChartIndexTerms ( text ):
+    terms = set()
+    for word in chartIndexWordPattern.findall(text.lower()):
+        if word not in chartIndexStopWords:
+            terms.add(word)
+            # runway designators are also found by their number alone
+            if word[-1].isalpha() and word[0].isdigit():
+                terms.add(word[:-1])
+
+    return terms
+
+
+#
+# Common routine to split a search word into the terms it must match, each
+# given as the word and the abbreviations that can stand in for it
+#
+def getChartQueryTerms ( text ):
+    terms = []
+    for word in chartIndexWordPattern.findall(text.lower()):
+        if word not in chartIndexStopWords:
+            terms.append((word,) + chartIndexSynonyms.get(word, ()))
+
+    return terms
+
+
+#
+# Common routine to open the chart index
+#
+def openChartIndex ( indexFilename ):
+    connection = sqlite3.connect(indexFilename, timeout = 60, isolation_level = None)
+    connection.execute("""CREATE TABLE IF NOT EXISTS charts (
+                            id INTEGER PRIMARY KEY,
+                            region TEXT, release TEXT, type TEXT, code TEXT, name TEXT, title TEXT, url TEXT, filename TEXT)""")
+    connection.execute("CREATE INDEX IF NOT EXISTS chartsRegion ON charts (region)")
+    connection.execute("CREATE INDEX IF NOT EXISTS chartsCode ON charts (code)")
+    connection.execute("CREATE TABLE IF NOT EXISTS terms (term TEXT, chart INTEGER, PRIMARY KEY (term, chart)) WITHOUT ROWID")
+
+    return connection
+
+
+#
+# Common routine to replace a region in the chart index with the dromes in
+# the AIP page data structure
+#
+def indexRegion ( indexFilename, aipRegion, currentRelease ):
+    connection = openChartIndex (indexFilename)
+    connection.execute("BEGIN IMMEDIATE")
+    connection.execute("DELETE FROM terms WHERE chart IN (SELECT id FROM charts WHERE region = ?)", (aipRegion,))
+    connection.execute("DELETE FROM charts WHERE region = ?", (aipRegion,))
+
+    charts = 0
+    for adType in aipPages:
+        for dromeStructure in aipPages[adType].values():
+            dromeCode = dromeStructure["Code"]
+            dromeName = dromeStructure["Name"]
+            dromeTerms = getChartIndexTerms(dromeName) | {dromeCode.lower()}
+            for title, (pdf_href, filename) in dromeStructure["PageLinks"].items():
+                cursor = connection.execute("INSERT INTO charts (region, release, type, code, name, title, url, filename) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                            (aipRegion, currentRelease, adType, dromeCode, dromeName, title, pdf_href, filename))
+                connection.executemany("INSERT OR IGNORE INTO terms (term, chart) VALUES (?, ?)",
+                                       [(term, cursor.lastrowid) for term in dromeTerms | getChartIndexTerms(title)])
+                charts += 1
+
+    connection.execute("COMMIT")
+    connection.close()
+    logger.info ("Indexed {0} charts for {1} in {2}".format(charts, aipRegion, indexFilename))
+
+    return
+
+
+#
+# Common routine to search the chart index. Every word of the query has to
+# match. A word ending in * matches as a prefix. An ICAO code with x for the
+# unknown letters, in either case, only matches the drome codes, so
+# "EGxx ground movement" finds the ground movement charts of every EG
+# aerodrome. A word that is also spelt like that, e.g. "apex", still
+# matches itself.
+#
+def searchChartIndex ( indexFilename, query, limit = 50 ):
+    if not os.path.exists(indexFilename):
+        logger.fatal ("No chart index {0}, generate a region first".format(indexFilename))
+        exit(1)
+
+    connection = openChartIndex (indexFilename)
+    matches = None
+    for word in query.split():
+        # each term gives the set of charts it matches, the query is all of them
+        icaoPattern = re.fullmatch(r"([A-Za-z]{1,3}?)x+", word) if len(word) == 4 else None
+        if icaoPattern:
+            prefix = icaoPattern.group(1).upper()
+            charts = set(chart for chart, in connection.execute("SELECT id FROM charts WHERE code >= ? AND code < ?", (prefix, prefix + "\uffff")))
+            charts |= set(chart for chart, in connection.execute("SELECT chart FROM terms WHERE term = ?", (word.lower(),)))
+            matches = charts if matches is None else matches & charts
+        elif word.endswith("*"):
+            for prefix in [term[0] for term in getChartQueryTerms(word[:-1])]:
+                charts = set(chart for chart, in connection.execute("SELECT chart FROM terms WHERE term >= ? AND term < ?", (prefix, prefix + "\uffff")))
+                matches = charts if matches is None else matches & charts
+        else:
+            for alternatives in getChartQueryTerms(word):
+                charts = set(chart for chart, in connection.execute("SELECT chart FROM terms WHERE term IN ({0})".format(",".join("?" * len(alternatives))), alternatives))
+                matches = charts if matches is None else matches & charts
+        if not matches:
+            break
+
+    results = []
+    if matches:
+        ids = sorted(matches)
+        for first in range(0, len(ids), 500):
+            chunk = ids[first:first + 500]
+            results.extend(connection.execute("SELECT region, code, name, title, url FROM charts WHERE id IN ({0})".format(",".join("?" * len(chunk))), chunk))
+        results.sort()
+    connection.close()
+
+    return len(results), results[:limit]
+
+
+#
+# Common routine to run a chart search from the command line
+#
+def runSearch ( indexFilename, query, limit ):
+    start = time.perf_counter()
+    found, results = searchChartIndex (indexFilename, query, limit)
+    for region, code, name, title, url in results:
+        print ("{0}  {1} - {2}  {3}\n    {4}".format(region, code, name, title, url))
+    print ("{0} charts found in {1:.1f} ms{2}".format(found, (time.perf_counter() - start) * 1000, ", showing {0}".format(limit) if found > limit else ""))
+
+    return
+
+
+#
+# Common routine to count the charts of each drome code in the previous
+# output of a region, trying each filename in turn. Returns None if there
+# is no previous output to compare against.
+#
+def getPreviousChartCounts ( outputFilenames ):
+    for outputFilename, sortOrder in outputFilenames:
+        if not os.path.exists(outputFilename):
+            continue
+        try:
+            dromes = readJsonOutput(outputFilename, sortOrder)
+        except Exception as e:
+            logger.info ("WARNING - Unable to read previous output {0}".format(outputFilename))
+            continue
+
+        chartCounts = {}
+        for adType, dromeCode, dromeName, dromeLinks in dromes:
+            chartCounts[dromeCode] = chartCounts.get(dromeCode, 0) + len(dromeLinks)
+        logger.debug ("Comparing against previous output {0}".format(outputFilename))
+        return chartCounts
+
+    return None
+
+
+#
+# Common routine to count the charts found for the given drome codes
+#
+def getChartCount ( dromeCodes = None ):
+    charts = 0
+    for adType in aipPages:
+        for dromeStructure in aipPages[adType].values():
+            if dromeCodes is None or dromeStructure["Code"] in dromeCodes:
+                charts += len(dromeStructure["PageLinks"])
+
+    return charts
+
+
+#
+# Common routine to pick the canary sample, a random draw of sampleSize
+# dromes that had charts in the previous output. The main page is walked
+# until every drome drawn is found, and if some of them are no longer
+# listed the sample is made up from the other dromes that had charts.
+# Returns the sample's drome jobs and the drome jobs to crawl, the jobs
+# walked so far followed by the rest of the main page.
+#
+def getCanaryJobs ( dromeJobs, previousCounts, sampleSize ):
+    candidates = sorted(code for code, charts in previousCounts.items() if charts > 0)
+    if not candidates:
+        return [], dromeJobs
+
+    # a fresh draw each run, so over time every drome gets checked
+    random.Random().shuffle(candidates)
+    sampleCodes = set(candidates[:sampleSize])
+
+    dromeJobs = iter(dromeJobs)
+    walkedJobs = []
+    canaryJobs = {}
+    for dromeJob in dromeJobs:
+        walkedJobs.append(dromeJob)
+        if dromeJob[1] in sampleCodes and dromeJob[1] not in canaryJobs:
+            canaryJobs[dromeJob[1]] = dromeJob
+            if len(canaryJobs) == len(sampleCodes):
+                break
+    else:
+        for dromeJob in walkedJobs:
+            if len(canaryJobs) >= sampleSize:
+                break
+            if previousCounts.get(dromeJob[1], 0) > 0 and dromeJob[1] not in canaryJobs:
+                canaryJobs[dromeJob[1]] = dromeJob
+
+    return list(canaryJobs.values()), itertools.chain(walkedJobs, dromeJobs)
+
+
+#
+# Canary crawl, crawls a sample of the drome pages before the full crawl
+# and compares their charts with the previous output. If the sample has far
+# fewer charts than before, the drome page layout has most likely changed,
+# so the run stops straight away rather than crawling every drome and
+# writing a library with no charts. The sample is always parsed, its chart
+# sections are hashed but not compared. Returns the links of the sample, so
+# the full crawl does not crawl it again.
+#
+def runCanaryCrawl ( aipRegion, canaryJobs, dromeParser, previousCounts, minRatio, workers, measuredCosts = None, sectionParser = None, sectionHashes = None, sectionOnly = False ):
+    if not canaryJobs:
+        return {}
+
+    sampleCodes = set(dromeJob[1] for dromeJob in canaryJobs)
+    crawlDromePages (canaryJobs, dromeParser, workers, canary = True, measuredCosts = measuredCosts, sectionParser = sectionParser, lastSections = {}, sectionHashes = sectionHashes, sectionOnly = sectionOnly)
+    charts = getChartCount(sampleCodes)
+    logger.info ("Canary crawl of {0} found {1} charts for {2}".format(aipRegion, charts, ", ".join(sorted(sampleCodes))))
+
+    previousCharts = sum(previousCounts.get(code, 0) for code in sampleCodes)
+    if previousCharts > 0 and charts < previousCharts * minRatio:
+        logger.fatal ("Canary crawl of {0} found {1} charts where the previous output had {2}, the drome pages have most likely changed layout".format(aipRegion, charts, previousCharts))
+        exit(1)
+
+    canaryDromes = {}
+    for type, code, name, baseUrl, dromeUrl in canaryJobs:
+        dromeStructure = aipPages[type].get(getAipPageKey(code, name))
+        if dromeStructure is not None:
+            canaryDromes[(type, code, name)] = dromeStructure["PageLinks"]
+
+    return canaryDromes
+
+
+#
+# Dry run of a crawl, walks the main page and predicts from earlier runs how
+# long the drome pages will take, in menu order and most expensive first
+#
+def planCrawl ( aipRegion, dromeJobs, dromeCosts, workers, processes ):
+    start = time.perf_counter()
+    dromeJobs = list(dromeJobs or [])
+    codes = [dromeJob[1] for dromeJob in dromeJobs]
+    mainSeconds = time.perf_counter() - start
+
+    known = len([code for code in codes if code in dromeCosts])
+    logger.info ("Plan for {0}: {1} drome pages, {2} with costs from earlier runs".format(aipRegion, len(codes), known))
+    if not dromeCosts:
+        logger.info ("No costs recorded for {0} yet, run it once to record them".format(aipRegion))
+        return
+
+    costliest = sorted(codes, key = lambda code: -predictDromeCost(dromeCosts, code))
+    planned = [dromeJob[1] for seq, dromeJob in getCostOrderedJobs(enumerate(dromeJobs), dromeCosts, costWindow)]
+    menuSeconds = predictCrawlSeconds (dromeCosts, codes, workers, processes)
+    plannedSeconds = predictCrawlSeconds (dromeCosts, planned, workers, processes)
+    logger.info ("Main page took {0:.1f} seconds".format(mainSeconds))
+    logger.info ("Predicted drome pages {0:.1f} seconds with {1} workers, {2:.1f} seconds in menu order".format(plannedSeconds, workers, menuSeconds))
+    logger.info ("Predicted run {0:.1f} seconds".format(mainSeconds + plannedSeconds))
+    for code in costliest[:10]:
+        logger.info ("    {0} {1:.2f} seconds".format(code, predictDromeCost(dromeCosts, code)))
+
+    return
+
+
+#
+# Common routine to read a catalog file back, as a dict of (AD type, code)
+# to (name, page URL)
+#
+def readCatalog ( catalogFilename ):
+    with open(catalogFilename, "r", encoding = "utf8") as file:
+        catalog = json.load(file)
+
+    return {(adType, dromeCode) : (dromeName, dromeHref) for adType, dromeCode, dromeName, dromeHref in catalog["Dromes"]}
+
+
+#
+# Catalog only run, writes the dromes found on the main page without
+# crawling their drome pages, and reports the dromes added and removed
+# since the last catalog. One drome per line so catalogs diff cleanly.
+#
+def catalogRegion ( aipRegion, dromeJobs, catalogFilename, currentDTG, currentRelease ):
+    # walking the jobs runs the main page parse, the drome pages are not fetched
+    if dromeJobs is not None:
+        for dromeJob in dromeJobs:
+            pass
+
+    dromes = {}
+    for adType in aipPages:
+        for dromeStructure in aipPages[adType].values():
+            dromes.setdefault((adType, dromeStructure["Code"]), (dromeStructure["Name"], dromeStructure["PageURL"]))
+
+    previous = None
+    if os.path.exists(catalogFilename):
+        try:
+            previous = readCatalog(catalogFilename)
+        except Exception as e:
+            logger.info ("WARNING - Unable to read the last catalog {0}, not comparing".format(catalogFilename))
+            logger.debug (traceback.format_exc())
+
+    if previous is not None:
+        # dromes filtered out are kept from the last catalog
+        for key, drome in previous.items():
+            if not wantDrome(*key):
+                dromes.setdefault(key, drome)
+
+        added = sorted(key for key in dromes if key not in previous)
+        removed = sorted(key for key in previous if key not in dromes)
+        for adType, dromeCode in added:
+            logger.info ("    Added {0} {1} [{2}]".format(dromeCode, dromes[(adType, dromeCode)][0], adType))
+        for adType, dromeCode in removed:
+            logger.info ("    Removed {0} {1} [{2}]".format(dromeCode, previous[(adType, dromeCode)][0], adType))
+        logger.info ("Catalog for {0}: {1} dromes, {2} added, {3} removed".format(aipRegion, len(dromes), len(added), len(removed)))
+    else:
+        logger.info ("Catalog for {0}: {1} dromes, no last catalog to compare with".format(aipRegion, len(dromes)))
+
+    rows = [json.dumps([adType, dromeCode, dromeName, dromeHref], ensure_ascii = False)
+            for (adType, dromeCode), (dromeName, dromeHref) in sorted(dromes.items())]
+    outputString = "{\n\t\"Region\": " + json.dumps(aipRegion) + ",\n"
+    outputString += "\t\"Release\": " + json.dumps(currentRelease) + ",\n"
+    outputString += "\t\"Generated\": " + json.dumps(currentDTG) + ",\n"
+    outputString += "\t\"Dromes\": [\n\t\t" + ",\n\t\t".join(rows) + "\n\t]\n}\n"
+    writeJsonOutput (catalogFilename, outputString)
+
+    return
+
+
+#
+# Generate the library for one region and AIRAC cycle, writing one JSON file
+# for each sort order. If dated is set the files are always dated with the
+# cycle's effective date, as when backfilling a range of cycles.
+#
+def generateRegion ( aipRegion, cycleIndex, currentDTG, outputOrders, args, dated = False ):
+    regionPlugin = getRegionPlugin(aipRegion)
+    aipRegionName = regionPlugin.regionName
+    aipRegionUrl = regionPlugin.regionUrl
+    if args.base_url:
+        aipRegionUrl = args.base_url.rstrip("/")
+
+    # start from an empty page structure
+    for adType in aipPages:
+        aipPages[adType].clear()
+
+    if args.trace:
+        startTrace (aipRegion)
+
+    currentRelease = effectiveDates[cycleIndex][3]
+    scheduleDate = effectiveDates[cycleIndex + 1][3] if cycleIndex + 1 < len(effectiveDates) else ""
+
+    logger.info ("Using {0} schedule date [{1}]. Next schedule date is [{2}]".format(effectiveDates[cycleIndex][0], currentRelease, scheduleDate))
+
+    # a cycle that is not effective yet is written to a dated file, so it
+    # does not replace the library in use until its effective date
+    datedRelease = None
+    if isCycleRegion(aipRegion) and (dated or currentRelease > currentDTG):
+        datedRelease = currentRelease
+
+    #
+    # set the base URL we want pages to hang from and then
+    # parse the main page and pull the airodrome page info
+    #
+    aipBaseUrl = regionPlugin.getAipBaseUrl(aipRegionUrl, getCycleDates(cycleIndex))
+    emitEvent ("start", region = aipRegion, cycle = effectiveDates[cycleIndex][0], release = currentRelease, dated = datedRelease is not None)
+    dromeJobs = regionPlugin.parseMainPage(aipBaseUrl, aipRegion)
+    dromeParser = regionPlugin.parseDromePage
+
+    # a dated cycle keeps its own costs and sections, starting from those of
+    # the library in use, so generating it never overwrites the files of
+    # the library in use. They are swapped in with its library
+    costsFilename = getOutputFilename(aipRegionName, ".costs", datedRelease)
+    sectionsFilename = getOutputFilename(aipRegionName, ".sections", datedRelease)
+
+    # drome costs from earlier runs, to fetch the expensive dromes first
+    dromeCosts = loadCrawlCosts (costsFilename if os.path.exists(costsFilename) else getOutputFilename(aipRegionName, ".costs"))
+    measuredCosts = {}
+
+    # chart sections from the last run, to only parse the drome pages that
+    # changed. With --reparse every page is parsed, and the sections hashed
+    sectionParser = getattr(regionPlugin, "getDromeSection", None)
+    sectionOnly = sectionParser is not None and getattr(regionPlugin, "parseSectionOnly", False)
+    parserVersion = getParserVersion (regionPlugin) if sectionParser else None
+    lastSections = {}
+    if sectionParser and not args.reparse:
+        lastSections = loadDromeSections (sectionsFilename if os.path.exists(sectionsFilename) else getOutputFilename(aipRegionName, ".sections"), parserVersion)
+    sectionHashes = {}
+
+    if args.plan:
+        planCrawl (aipRegion, dromeJobs, dromeCosts, args.workers, args.processes)
+        return
+
+    if args.catalog_only:
+        catalogRegion (aipRegion, dromeJobs, getOutputFilename(aipRegionName, ".catalog", datedRelease), currentDTG, currentRelease)
+        return
+
+    # output filenames, tagged with the sort order if there is more than one
+    outputFilenames = {}
+    for sortOrder in outputOrders:
+        if len(outputOrders) > 1:
+            outputFilenames[sortOrder] = getOutputFilename(aipRegionName, ".json", datedRelease, sortOrder)
+        else:
+            outputFilenames[sortOrder] = getOutputFilename(aipRegionName, ".json", datedRelease)
+
+    # compare with this cycle's output if there is one, or else the library
+    # in use
+    sortOrder = outputOrders[0]
+    previousCounts = getPreviousChartCounts ([(outputFilenames[sortOrder], sortOrder),
+                                              (getOutputFilename(aipRegionName, ".json", None, sortOrder if len(outputOrders) > 1 else None), sortOrder)])
+
+    # crawl a sample of the dromes that had charts to catch a broken parser
+    # early, when there is a previous library to compare with. The rest of
+    # the main page is walked as the full crawl goes
+    canaryJobs = []
+    canaryDromes = {}
+    if dromeJobs is not None and args.canary > 0 and previousCounts is not None:
+        canaryJobs, dromeJobs = getCanaryJobs (dromeJobs, previousCounts, args.canary)
+        if not canaryJobs:
+            logger.info ("No drome of {0} had charts in the previous output, skipping the canary crawl".format(aipRegion))
+        canaryDromes = runCanaryCrawl (aipRegion, canaryJobs, dromeParser, previousCounts, args.canary_ratio, args.workers,
+                                       measuredCosts = measuredCosts, sectionParser = sectionParser, sectionHashes = sectionHashes, sectionOnly = sectionOnly)
+
+    # memory bounded crawl, in flight cap in bytes
+    maxBytes = int(args.max_mb * 1024 * 1024)
+
+    # journal each drome as it is done, so an interrupted run can be resumed
+    journalFilename = getOutputFilename(aipRegionName, ".journal", datedRelease)
+    journal, resumedDromes = openCrawlJournal (journalFilename, aipRegion, currentRelease, args.resume)
+
+    # walk the main page and crawl the drome pages it yields, the canary
+    # dromes are journalled and not crawled again
+    with journal:
+        for dromeJob in canaryJobs:
+            key = tuple(dromeJob[:3])
+            if key in canaryDromes and key not in resumedDromes:
+                writeCrawlJournal (journal, dromeJob, canaryDromes[key])
+                resumedDromes[key] = canaryDromes[key]
+        if canaryDromes:
+            logger.info ("Keeping the {0} canary dromes for the full crawl".format(len(canaryDromes)))
+        if args.coordinator:
+            crawlDromePagesQueued (args.coordinator, aipRegion, dromeJobs, journal = journal, resumedDromes = resumedDromes)
+        elif args.processes > 0 and not dated:
+            with concurrent.futures.ProcessPoolExecutor(args.processes) as pool:
+                crawlDromePages (dromeJobs, dromeParser, args.workers, pool = pool, journal = journal, resumedDromes = resumedDromes, maxPages = args.max_pages, maxBytes = maxBytes, dromeCosts = dromeCosts, measuredCosts = measuredCosts,
+                                 sectionParser = sectionParser, lastSections = lastSections, sectionHashes = sectionHashes, sectionOnly = sectionOnly)
+        else:
+            crawlDromePages (dromeJobs, dromeParser, args.workers, journal = journal, resumedDromes = resumedDromes, maxPages = args.max_pages, maxBytes = maxBytes, dromeCosts = dromeCosts, measuredCosts = measuredCosts,
+                             sectionParser = sectionParser, lastSections = lastSections, sectionHashes = sectionHashes, sectionOnly = sectionOnly)
+
+    if measuredCosts:
+        saveCrawlCosts (costsFilename, dromeCosts, measuredCosts)
+
+    # a filtered run only crawled some dromes, so keep the rest from the
+    # existing output
+    if dromeFilter is not None:
+        for sortOrder in outputOrders:
+            mergeJsonOutput (outputFilenames[sortOrder], sortOrder)
+
+    # never replace a library that had charts with one that has none
+    if previousCounts and sum(previousCounts.values()) > 0 and getChartCount() == 0:
+        logger.fatal ("No charts found for {0}, keeping the previous output".format(aipRegion))
+        exit(1)
+
+    #
+    # create the JSON files, one for each sort order from the same crawl
+    #
+    for sortOrder in outputOrders:
+        with traceSpan ("output " + sortOrder, "output", code = sortOrder, file = outputFilenames[sortOrder]):
+            writeJsonOutput (outputFilenames[sortOrder], createJsonOutput(aipRegion, sortOrder, currentDTG, currentRelease))
+
+    # the run is complete so the journal is no longer needed
+    os.remove(journalFilename)
+
+    if sectionHashes:
+        saveDromeSections (sectionsFilename, parserVersion, lastSections, sectionHashes)
+
+    # the index is of the libraries in use, so not of future or backfilled cycles
+    if datedRelease is None:
+        indexRegion (args.index, aipRegion, currentRelease)
+
+    return
+
+
+#
+# Common routine to set the request options from the command line
+#
+def setRequestOptions ( args, deadline ):
+    global connectTimeout, readTimeout, runDeadline, hedgeRequests
+
+    connectTimeout = args.connect_timeout
+    readTimeout = args.read_timeout
+    runDeadline = deadline
+    hedgeRequests = args.hedge
+
+    return
+
+
+#
+# Backfill worker, generates a range of AIRAC cycles for one region in
+# order. Every page URL has the cycle in it, so the page cache is emptied
+# after each cycle rather than holding every cycle's pages. Nothing else
+# is shared between the cycles, each fetches its pages with one connection
+# per request, and each keeps its own dated costs and sections.
+# Returns the AIRAC numbers that failed and any trace events recorded.
+#
+def backfillRegion ( aipRegion, cycleIndexes, currentDTG, outputOrders, args, deadline ):
+    logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+    setRequestOptions (args, deadline)
+    setDromeFilter (args)
+
+    failed = []
+    for cycleIndex in cycleIndexes:
+        try:
+            generateRegion (aipRegion, cycleIndex, currentDTG, outputOrders, args, True)
+        except SystemExit:
+            logger.error ("Backfill of {0} {1} failed".format(aipRegion, effectiveDates[cycleIndex][0]))
+            failed.append(effectiveDates[cycleIndex][0])
+        finally:
+            releaseWebPages ()
+
+    return failed, traceEvents
+
+
+#
+# Backfill a range of AIRAC cycles for a set of regions. Each region runs in
+# its own process, so one region's site being slow does not hold up the
+# others, and exits once every region is done.
+#
+def runBackfill ( regions, backfill, currentDTG, outputOrders, args, deadline ):
+    fromIndex = getAiracCycle (backfill[0], currentDTG)
+    toIndex = getAiracCycle (backfill[1], currentDTG)
+    if fromIndex is None or toIndex is None or fromIndex > toIndex:
+        logger.fatal ("Invalid backfill range [{0}] to [{1}]".format(backfill[0], backfill[1]))
+        exit(1)
+
+    # only the regions that publish each cycle can be backfilled
+    backfillRegions = []
+    for aipRegion in dict.fromkeys(regions):
+        if isCycleRegion(aipRegion):
+            backfillRegions.append(aipRegion)
+        else:
+            logger.info ("WARNING - {0} only publishes the live AIP, not backfilled".format(getRegionPlugin(aipRegion).regionName))
+
+    if args.trace:
+        startTrace ("")
+
+    # skip cycles that are not published yet
+    cycleIndexes = [cycleIndex for cycleIndex in range(fromIndex, toIndex + 1) if effectiveDates[cycleIndex][2] <= currentDTG]
+    logger.info ("Backfilling {0} cycles for {1}".format(len(cycleIndexes), ", ".join(backfillRegions)))
+
+    failures = 0
+    with concurrent.futures.ProcessPoolExecutor(max(1, len(backfillRegions))) as pool:
+        futures = {}
+        for aipRegion in backfillRegions:
+            futures[aipRegion] = pool.submit(backfillRegion, aipRegion, cycleIndexes, currentDTG, outputOrders, args, deadline)
+
+        for aipRegion, future in futures.items():
+            try:
+                failed, events = future.result()
+                if events:
+                    traceEvents.extend(events)
+            except Exception:
+                logger.error ("Backfill of {0} failed".format(aipRegion))
+                logger.debug (traceback.format_exc())
+                failed = [effectiveDates[cycleIndex][0] for cycleIndex in cycleIndexes]
+            if failed:
+                logger.info ("{0}: {1} of {2} cycles failed: {3}".format(aipRegion, len(failed), len(cycleIndexes), ", ".join(failed)))
+            else:
+                logger.info ("{0}: all {1} cycles generated".format(aipRegion, len(cycleIndexes)))
+            failures += len(failed)
+
+    if args.trace:
+        writeTrace (args.trace)
+    logPeakMemory ()
+    logger.info ("Finished")
+    exit(1 if failures else 0)
+
+
+#
+# Start of main code
+#
+def main ():
+    #
+    # Parse the command line
+    #
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--list-regions', action="store_true", help='List the regions that can be generated', default=False)
+    parser.add_argument('--region', help='Region to generate [{0}]'.format(" | ".join(getRegions())), choices=getRegions(), default="UK")
+    parser.add_argument('--previous', action="store_true", help='User previous schedule', default=False)
+    parser.add_argument('--cycle', help='AIRAC cycle to generate [next | current | previous | "AIRAC nn/yyyy"]', default="current")
+    parser.add_argument('--schedule', action="store_true", help='Run forever, generating each cycle as soon as it is published', default=False)
+    parser.add_argument('--schedule-hours', type=float, help='Hours between scheduler checks', default=6)
+    parser.add_argument('--codesort', action="store_true", help='Sort by Drome code, not Drome name', default=False)
+    parser.add_argument('--sortorder', nargs="+", help='Sort orders to write, one output file for each [NAME | CODE]', choices=sortOrders)
+    parser.add_argument('--debug', action="store_true", help='Set debug logging', default=False)
+    parser.add_argument('--log', help='Log file to write, default aipParser.log, or for a worker "aipParser worker HOST PID.log"')
+    parser.add_argument('--workers', type=int, help='Number of drome pages to fetch at the same time', default=4)
+    parser.add_argument('--processes', type=int, help='Number of processes to parse drome pages with, 0 parses in the fetch process', default=0)
+    parser.add_argument('--max-pages', type=int, help='Most drome pages to hold in memory at once, 0 for no limit', default=0)
+    parser.add_argument('--max-mb', type=float, help='Most MB of drome pages to hold in memory at once, 0 for no limit', default=0)
+    parser.add_argument('--connect-timeout', type=float, help='Seconds to wait for a site to connect and start answering', default=connectTimeout)
+    parser.add_argument('--read-timeout', type=float, help='Seconds to wait for each read of a page once it starts arriving', default=readTimeout)
+    parser.add_argument('--deadline', type=float, help='Seconds the whole run has to finish in, fail the run if it takes longer')
+    parser.add_argument('--resume', action="store_true", help='Carry on from the journal of an interrupted run', default=False)
+    parser.add_argument('--hedge', action="store_true", help='Send a duplicate request when a page is slower than the site normally is', default=False)
+    parser.add_argument('--backfill', nargs=2, metavar=('FROM', 'TO'), help='Generate every cycle from FROM to TO, e.g. "AIRAC 01/2026" "AIRAC 06/2026"')
+    parser.add_argument('--serve', action="store_true", help='Serve the generated libraries over HTTP, on its own or alongside --schedule', default=False)
+    parser.add_argument('--serve-host', help='Address to serve the libraries on', default="127.0.0.1")
+    parser.add_argument('--serve-port', type=int, help='Port to serve the libraries on', default=8080)
+    parser.add_argument('--canary', type=int, help='Number of dromes to crawl first, to check the drome pages still parse before the full crawl, 0 for none', default=5)
+    parser.add_argument('--canary-ratio', type=float, help='Stop the run if the canary dromes have less than this share of their charts in the previous output', default=0.5)
+    parser.add_argument('--events', action="store_true", help='Write progress events to stdout as JSON lines, for a service following the run', default=False)
+    parser.add_argument('--base-url', help='Site URL to crawl instead of the region AIP site, e.g. a mirror or a local copy')
+    parser.add_argument('--reparse', action="store_true", help='Parse every drome page, even those whose charts section is unchanged since the last run', default=False)
+    parser.add_argument('--catalog-only', action="store_true", help='Only walk the main page and write the dromes found to a catalog file, reporting the dromes added and removed since the last one', default=False)
+    parser.add_argument('--plan', action="store_true", help='Dry run, walk the main page and predict how long the run will take from earlier runs', default=False)
+    parser.add_argument('--index', help='Chart index file, updated by every run and read by --search', default="AIP Index.db")
+    parser.add_argument('--search', metavar='QUERY', help='Search the chart index, e.g. "EGLL rnp 27" or "EGxx ground movement"')
+    parser.add_argument('--search-limit', type=int, help='Most charts to show from a search', default=50)
+    parser.add_argument('--trace', help='Write a Chrome trace of the run to this file, to open as a timeline in chrome://tracing or Perfetto')
+    parser.add_argument('--coordinator', metavar='QUEUE', help='Put the drome pages on this shared work queue file for --worker processes to crawl')
+    parser.add_argument('--worker', metavar='QUEUE', help='Crawl drome pages from this shared work queue file until it is idle')
+    parser.add_argument('--lease', type=float, help='Seconds a worker has to finish a drome page before another worker may take it', default=300)
+    parser.add_argument('--worker-idle', type=float, help='Seconds a worker waits on an empty queue before stopping', default=60)
+    parser.add_argument('--only', help='Only crawl these drome codes, comma separated and glob patterns allowed e.g. EGLL,EGKK or EG*', default="")
+    parser.add_argument('--exclude', help='Do not crawl these drome codes, comma separated and glob patterns allowed', default="")
+    parser.add_argument('--ad-type', help='Only crawl this AD type [2 | 3]', choices=["2", "3"])
+    parser.add_argument('--regions', nargs="+", help='Regions to backfill, one process for each region', choices=getRegions())
+    args = parser.parse_args()
+
+    if args.list_regions:
+        for aipRegion in getRegions():
+            print ("{0}  {1}{2}".format(aipRegion, getRegionPlugin(aipRegion).regionName, ", per AIRAC cycle" if isCycleRegion(aipRegion) else ""))
+        exit(0)
+
+    if args.search:
+        runSearch (args.index, args.search, args.search_limit)
+        exit(0)
+
+    # setup the file logger, only once we know there is a run to log. Each
+    # worker has its own log, as workers share the coordinator's folder
+    logFilename = args.log
+    if logFilename is None:
+        logFilename = "aipParser.log"
+        if args.worker:
+            logFilename = "aipParser worker {0} {1}.log".format(socket.gethostname(), os.getpid())
+    logging.basicConfig(level=logging.INFO,
+                        format = u"%(asctime)s: %(levelname)-8s: %(message)s", 
+                        datefmt = "%Y-%m-%d %H:%M:%S",
+                        handlers=[logging.FileHandler(logFilename, "w", "utf-8")])
+
+    logger.info ("Started")
+
+    aipRegion = ""
+    aipRegionName = ""
+    usePreviousSchedule = False
+
+    if args.region in getRegions():
+        aipRegion = args.region
+        aipRegionName = getRegionPlugin(aipRegion).regionName
+    else:
+        logger.fatal ("Unknown region passed: {0}".format(args.region))
+        exit(1)
+    # with no fetch workers the drome pages would never be fetched
+    if args.workers < 1:
+        logger.fatal ("Invalid number of workers passed: {0}, at least 1 is needed".format(args.workers))
+        exit(1)
+    if args.debug:
+        logging.getLogger("aipParser").setLevel(logging.DEBUG)
+        console.setLevel(logging.DEBUG)
+    outputOrders = ["NAME"]
+    if args.codesort:
+        outputOrders = ["CODE"]
+    if args.sortorder:
+        outputOrders = list(dict.fromkeys(args.sortorder))
+    if args.previous:
+        usePreviousSchedule = True
+    if args.serve:
+        startServer (args.serve_host, args.serve_port)
+        # with no scheduler just serve until stopped
+        if not args.schedule:
+            while True:
+                time.sleep(3600)
+    if args.schedule:
+        runScheduler (sys.argv[1:], args.schedule_hours, aipRegion, outputOrders, args.index)
+    deadline = None
+    if args.deadline:
+        deadline = time.monotonic() + args.deadline
+    setRequestOptions (args, deadline)
+    setDromeFilter (args)
+    if args.events:
+        startProgressEvents ()
+
+    if args.worker:
+        runQueueWorker (args.worker, args.lease, args.worker_idle)
+        logger.info ("Finished")
+        exit(0)
+
+    #
+    # Work out what the current schedule date should be.
+    # Or you can just hard code it to the one you want.
+    #
+    currentDTG = datetime.datetime.now().strftime("%Y-%m-%d")
+    logger.debug ("Current date is [{0}]".format(currentDTG))
+
+    # check if we want to use the previous schedule
+    cycle = args.cycle
+    if usePreviousSchedule:
+        cycle = "previous"
+
+    if args.backfill:
+        runBackfill (args.regions or [aipRegion], args.backfill, currentDTG, outputOrders, args, deadline)
+
+    cycleIndex = getAiracCycle (cycle, currentDTG)
+    if cycleIndex is None:
+        logger.fatal ("No AIRAC cycle found for [{0}] on [{1}]".format(cycle, currentDTG))
+        exit(1)
+
+    if not isCycleRegion(aipRegion) and cycle != "current":
+        logger.info ("WARNING - {0} only publishes the live AIP, cycle [{1}] ignored".format(aipRegionName, cycle))
+
+    # the trace is written even if the run fails, to show where the time went
+    try:
+        generateRegion (aipRegion, cycleIndex, currentDTG, outputOrders, args)
+    finally:
+        if args.trace:
+            writeTrace (args.trace)
+
+    #
+    # lets exit
+    #
+    logPeakMemory ()
+    emitEvent ("finished", peakMb = getPeakMemory())
+    logger.info ("Finished")
+    exit(0)
+
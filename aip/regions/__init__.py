@@ -0,0 +1,45 @@
+##################################################################
+#
+# Region plugins for aipParser, one module per region named after the
+# region code in lower case, e.g. aip/regions/fr.py for FR. Every two
+# letter module in this folder is a region, so a region is added by adding
+# its module. Modules with longer names, like eaip.py, are shared code.
+#
+# aipParser only imports the plugin of the region being generated, so
+# a run does not pay for loading every region's code.
+#
+# Each plugin provides:
+#   regionName
+#       the region name used in the output filenames, e.g. "France"
+#   regionUrl
+#       the AIP site, the base URL is built from it
+#   perCycle
+#       optional, True if the AIP is published per AIRAC cycle rather
+#       than only the live AIP, so any cycle can be generated
+#   getAipBaseUrl(aipRegionUrl, cycle)
+#       the AIP base URL for an AIRAC cycle. cycle is a dict with the
+#       "release" (effective) and "published" dates and the "offset"
+#       of the cycle in the schedule table
+#   parseMainPage(aipBaseUrl, aipRegion)
+#       parses the main page, adding each drome to the AIP page data
+#       and yielding a (type, code, name, baseUrl, dromeUrl) job for
+#       each drome page to crawl. A region whose main page holds the
+#       chart links adds them itself and returns None
+#   parseDromePage(type, code, baseUrl, html)
+#       returns the {title: (url, filename)} charts of a drome page,
+#       or None if the region has no drome pages. It is sent to the
+#       parse processes, so it has to be a module level function or
+#       a functools.partial of one
+#   getDromeSection(type, code, page)
+#       optional, returns the bytes of a drome page that hold its charts,
+#       found without parsing the page, or None. A drome whose section
+#       is unchanged since the last run reuses its links rather than
+#       being parsed
+#   parseSectionOnly
+#       optional, True if parseDromePage only reads what getDromeSection
+#       returns, so only that section of each page is parsed
+#
+# The regions whose sites share the eAIP layout give a spec for the
+# engine in aip/regions/eaip.py instead of their own parsers.
+#
+##################################################################
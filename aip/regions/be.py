@@ -0,0 +1,107 @@
+##################################################################
+#
+# BE - Belgium AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+from aip.core import adType2, adType3, addAipPage, getWebPage, logger, wantDrome
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "Belgium"
+regionUrl = "https://ops.skeyes.be/html/belgocontrol_static"
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    return "{0}/eaip/eAIP_Main".format(aipRegionUrl)
+
+
+#
+# parse the main BE AIP page to get list of Aerodromes and their
+# associated information pages, yielding a drome page job for each
+#
+def parseMainPageBE ( aipBaseUrl, aipRegion ):
+    aipMainPage = "{0}/html/eAIP/EB-menu-en-GB.html".format(aipBaseUrl)
+
+    # get site page
+    html = getWebPage ( "Aip",  aipRegion, aipMainPage, True )
+
+    # loop through all the link tags
+    for link in html.find_all("a"):
+        #logger.debug (link)
+        type = ""
+        title = ""
+        href = ""
+        id = ""
+        code = ""
+        name = link.get_text()[6:]
+        if ("title" in link.attrs):
+            title = link["title"]
+        if ("href" in link.attrs):
+            href = link["href"]
+        if ("id" in link.attrs):
+            id = link["id"]
+            if ("AD-2." == id[:5]):
+                type = adType2
+            elif ("AD-3." == id[:5]):
+                type = adType3
+
+            if type not in ("", None):
+                idSplit = id.split(".")
+                if len(idSplit) == 2:
+                    code = idSplit[1]
+
+        #logger.debug (title + "==" + code + "==" + href + "==" + type)
+
+        # check if this is a valid link we want
+        if (title and href and code and type and wantDrome(type, code)):
+            new_href = aipBaseUrl + "/html/eAIP/" + href.replace("#" + id, "")
+            addAipPage (type, code, name, new_href)
+            yield type, code, name, aipBaseUrl, new_href
+
+    return
+
+
+#
+# parse the BE AIP airodrome page to get list of PDF chart files that
+# are available for that airodrome
+#
+def parseDromePageBE ( type, code, baseUrl, html ):
+    pdfPages = {}
+    newTitle = ""
+    title = ""
+    for tr in html.find_all("tr"):
+        #logger.debug (tr)
+        href = ""
+        for td in tr.find_all("td"):
+            title = newTitle.replace("&", "and")
+            newTitle = td.get_text().strip()
+
+            for div in td.find_all("div"):
+                # check we are in the chart section
+                if not div.find_all("img"):
+                    continue
+
+                # grab the link href
+                for link in div.find_all("a"):
+                    if ("href" in link.attrs):
+                        href = link["href"]
+                
+        # check we have both parts
+        if (title and href):
+            new_href = baseUrl + "/" + href.replace("../", "")
+            filename = code + " - " + title.replace("/", "-") + ".pdf"
+            pdfPages[title] = new_href, filename
+            logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, new_href, filename))
+
+    return pdfPages
+
+
+# plugin entry points
+parseMainPage = parseMainPageBE
+parseDromePage = parseDromePageBE
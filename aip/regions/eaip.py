@@ -0,0 +1,251 @@
+##################################################################
+#
+# eAIP extraction engine for aipParser, shared by the region plugins
+# whose sites use the same eAIP menu and AD 2.24 chart table layout.
+#
+##################################################################
+
+import functools
+import re
+
+from aip.core import adType2, adType3, addAipPage, getDivBytes, getWebPage, logger, wantDrome
+
+
+#
+# Declarative extraction specs for the eAIP sites that share the same
+# menu and AD 2.24 chart table layout. Each spec says where the menu
+# page is, how a menu link splits into drome code and name, which
+# divs hold the charts, how a chart row gives its title, and how the
+# titles, filenames and URLs are cleaned up and joined.
+#
+# Menu rules:
+#   menuPage    - menu page path below the base URL
+#   menuTitle   - "attr" to use the link title attribute, or the class of
+#                 the span holding the title. Links with a title are not dromes
+#   menuCode    - "firstWord" of the link text, or "prefix" first 4 characters
+#   menuName    - "span" text of the nameSpan, "afterCode" the rest of the
+#                 link text, or "offset" the link text from character 7
+#   nameSpan    - span class holding the drome name
+#   dropSpan    - span class whose text is removed from the link text
+#   skipHrefs   - link hrefs that are not drome pages
+#   skipTexts   - link texts that are not dromes
+#   menuHref    - format of the drome page URL
+#
+# Drome page rules:
+#   sectionIds   - ids of the divs holding the charts table
+#   sectionCase  - False to match the section ids ignoring case
+#   chartTitle   - "paragraph" last paragraph in the row, carried on to the
+#                  following rows, or "cell" first non empty cell in the row
+#   titleReplace - replacements to clean up the chart title
+#   chartHref    - format of the chart URL
+#   chartFile    - format of the chart filename
+#
+
+# spec values used when a region does not set them
+eAipSpecDefaults = {
+    "menuTitle": "attr",
+    "menuCode": "firstWord",
+    "menuName": "span",
+    "nameSpan": None,
+    "dropSpan": None,
+    "skipHrefs": ("#",),
+    "skipTexts": (),
+    "menuHref": "{baseUrl}/html/{href}",
+    "sectionIds": ("{code}-AD-2.24", "{code}-AD-3.23"),
+    "sectionCase": True,
+    "chartTitle": "paragraph",
+    "titleReplace": (("\r", ""), ("\n", "")),
+    "chartHref": "{baseUrl}/{href}",
+    "chartFile": "{code} - {title}.pdf"
+}
+
+
+#
+# Compile a region spec, filling in the defaults and checking the rules
+# so the extraction engine does not have to at every link or row
+#
+def compileSpec ( region, spec ):
+    compiled = dict(eAipSpecDefaults)
+    compiled.update(spec)
+    compiled["region"] = region
+
+    rules = {
+        "menuCode": ("firstWord", "prefix"),
+        "menuName": ("span", "afterCode", "offset"),
+        "chartTitle": ("paragraph", "cell")
+    }
+    for rule in rules:
+        if compiled[rule] not in rules[rule]:
+            raise ValueError("Unknown {0} rule [{1}] for region [{2}]".format(rule, compiled[rule], region))
+
+    compiled["skipHrefs"] = frozenset(compiled["skipHrefs"])
+    compiled["skipTexts"] = frozenset(compiled["skipTexts"])
+    compiled["titleReplace"] = tuple(compiled["titleReplace"])
+
+    return compiled
+
+
+#
+# Common routine to get the text of the last span with the given class
+#
+def getSpanText ( link, spanClass ):
+    text = ""
+    for span in link.find_all("span", class_=spanClass):
+        text = span.get_text()
+
+    return text
+
+
+#
+# Common routine to apply a list of replacements to a string
+#
+def replaceAll ( text, replacements ):
+    for old, new in replacements:
+        text = text.replace(old, new)
+
+    return text
+
+
+#
+# parse the main AIP page of a spec driven region to get list of Aerodromes
+# and their associated information pages, yielding a drome page job for each
+#
+def parseMainPageSpec ( spec, aipBaseUrl, aipRegion ):
+    aipMainPage = "{0}/{1}".format(aipBaseUrl, spec["menuPage"])
+
+    # get site page
+    html = getWebPage ( "AIP",  aipRegion, aipMainPage )
+
+    # loop through all the link tags
+    type = ""
+    for link in html.find_all("a"):
+        text = link.get_text()
+        href = link.get("href", "")
+        id = link.get("id", "")
+
+        if ("AD-2plus" == id):
+            type = adType2
+        elif ("AD-3plus" == id):
+            type = adType3
+
+        # links with a title are section headers, not dromes
+        if spec["menuTitle"] == "attr":
+            title = link.get("title", "").replace("\r", "").replace("\n", "")
+        else:
+            title = getSpanText(link, spec["menuTitle"])
+        if spec["dropSpan"]:
+            for span in link.find_all("span", class_=spec["dropSpan"]):
+                text = text.replace(span.get_text(), "")
+
+        # split the link into drome code and name
+        if spec["menuCode"] == "firstWord":
+            words = text.split()
+            code = words[0] if words else ""
+        else:
+            code = text.strip()[:4]
+        if spec["menuName"] == "span":
+            name = getSpanText(link, spec["nameSpan"])
+        elif spec["menuName"] == "afterCode":
+            name = text.replace(code, "").strip() if code else text
+        else:
+            name = text.strip()[7:]
+
+        #logger.debug (title + "==" + code + "==" + name + "==" + href + "==" + type)
+
+        # check if this is a valid link we want
+        if (not title and href not in spec["skipHrefs"] and text not in spec["skipTexts"] and code and type and wantDrome(type, code)):
+            new_href = spec["menuHref"].format(baseUrl = aipBaseUrl, href = href.replace("../", "").replace("#" + id, ""))
+            addAipPage (type, code, name, new_href)
+            yield type, code, name, aipBaseUrl, new_href
+
+    return
+
+
+#
+# parse the AIP airodrome page of a spec driven region to get list of
+# PDF chart files that are available for that airodrome
+#
+def parseDromePageSpec ( spec, type, code, baseUrl, html ):
+    sectionIds = set(sectionId.format(code = code) for sectionId in spec["sectionIds"])
+    if not spec["sectionCase"]:
+        sectionIds = set(sectionId.upper() for sectionId in sectionIds)
+
+    pdfPages = {}
+    for div in html.find_all("div"):
+        # check if we are in the charts section
+        id = div.get("id")
+        if id is None:
+            continue
+        if not spec["sectionCase"]:
+            id = id.upper()
+        if id not in sectionIds:
+            continue
+
+        # in charts section so parse the table
+        title = ""
+        href = ""
+        for tr in div.find_all("tr"):
+            if spec["chartTitle"] == "paragraph":
+                # grab the link title, it carries on to following rows
+                paragraphs = tr.find_all("p")
+                if paragraphs:
+                    title = replaceAll(paragraphs[-1].get_text(), spec["titleReplace"])
+                    href = ""
+            else:
+                # grab the first non empty cell as the title
+                title = ""
+                href = ""
+                tds = tr.find_all("td")
+                if not tds:
+                    continue
+                for td in tds:
+                    title = replaceAll(td.get_text(), spec["titleReplace"])
+                    if title:
+                        break
+
+            # grab the last link href in the row
+            links = tr.find_all("a", href=True)
+            if links:
+                href = links[-1]["href"]
+
+            # check we have both parts
+            if (title and href):
+                new_href = spec["chartHref"].format(baseUrl = baseUrl, href = href.replace("../", ""))
+                filename = spec["chartFile"].format(code = code, title = title.replace("/", "-"))
+                pdfPages[title] = new_href, filename
+                logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, new_href, filename))
+
+    return pdfPages
+
+
+#
+# get the chart section of a spec driven region's drome page bytes, the
+# divs parseDromePageSpec reads, without parsing the page. None if there
+# are none, so the page is parsed
+#
+def getDromeSectionSpec ( spec, type, code, page ):
+    sections = []
+    for sectionId in spec["sectionIds"]:
+        idPattern = re.escape(sectionId.format(code = code).encode())
+        if not spec["sectionCase"]:
+            idPattern = b"(?i:" + idPattern + b")"
+        for match in re.finditer(rb"(?i:<div\s(?:[^>]*\s)?id\s*=\s*[\"'])" + idPattern + rb"[\"']", page):
+            sections.append(getDivBytes(page, match.start()))
+
+    return b"".join(sections) if sections else None
+
+
+#
+# Common routine to get the plugin entry points for a region spec
+#
+def getSpecParsers ( region, spec ):
+    compiled = compileSpec(region, spec)
+
+    return functools.partial(parseMainPageSpec, compiled), functools.partial(parseDromePageSpec, compiled)
+
+
+#
+# Common routine to get the getDromeSection plugin entry point for a region spec
+#
+def getSpecSection ( region, spec ):
+    return functools.partial(getDromeSectionSpec, compileSpec(region, spec))
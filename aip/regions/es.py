@@ -0,0 +1,145 @@
+##################################################################
+#
+# ES - Spain AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+from aip.core import adType2, adType3, addAipPage, getWebPage, logger, updateAipPageLinks, wantDrome
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "Spain"
+regionUrl = "https://aip.enaire.es"
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    return "{0}/AIP".format(aipRegionUrl)
+
+
+#
+# parse the main ES AIP page to get list of Aerodromes and their
+# associated information pages
+#
+def parseMainPageES ( aipBaseUrl, aipRegion ):
+    aipMainPage = "{0}/AIP-es.html".format(aipBaseUrl)
+
+    # get site page
+    html = getWebPage ( "Aip",  aipRegion, aipMainPage )
+
+    # for this site we need to keep track of the code
+    # so we can look up the drome name
+    dromeMapping = {}
+
+    type = ""
+    old_code = ""
+    old_name = ""
+    code = ""
+    name = ""
+    title = ""
+    href = ""
+    dromeDetail = False
+    tmpPages = {}
+    for item in html.find_all(["h1", "td"]):
+        #logger.debug ("{0} == {1} == {2}".format(type, item.name, item))
+
+        # try and find the section start
+        if item.name == "h1":
+            if item.get_text() == "AD 2":
+                type = adType2
+                dromeDetail = False
+                continue
+            elif item.get_text() == "AD 3":
+                type = adType3
+                dromeDetail = False
+                old_code = ""
+                continue
+            else:
+                if type not in ("", None):
+                    dromeDetail = True
+                    continue
+
+        if type in ("", None):
+            continue
+
+        if item.name == "td" and not dromeDetail:
+            if ("class" in item.attrs):
+                if item["class"][0] == "id":
+                    # some drome codes have xxxx/xxxx so ignore second part
+                    code = item.get_text()[:4]
+                elif item["class"][0] == "desc":
+                    name = item.get_text()
+            if (type and code and name):
+                if wantDrome(type, code):
+                    addAipPage(type, code, name, href)
+                dromeMapping[code] = name
+                code = ""
+                name = ""
+
+        if item.name == "td" and dromeDetail:
+            if ("class" in item.attrs):
+                if item["class"][0] == "id":
+                    text = item.get_text()
+                    code = text[5:9]
+
+                    if ("onclick" in item.attrs):
+                        onclick = item["onclick"]
+                        if onclick.find(".pdf") >= 0:
+                            href = "{0}/{1}".format(aipBaseUrl, onclick.split("\'")[1])
+                        else:
+                            code = ""
+                            href = ""
+                            title = ""
+                if item["class"][0] == "desc" and code not in ("", None):
+                    title = item.get_text().replace("&", "and")
+
+            if (type and code and title and href):
+                filename = code + " - " + title.replace("/", "-").replace(".", "") + ".pdf"
+                logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, href, filename))
+
+                if old_code == "" or old_code == code:
+                    tmpPages[title] = href, filename
+                    old_code = code
+                    old_name = name
+                elif old_code != code:
+                    # add the links to the page structure
+                    updateAipPageLinks (type, old_code, dromeMapping[old_code], tmpPages)
+
+                    tmpPages = {}
+                    tmpPages[title] = href, filename
+                    old_code = code
+                    old_name = name
+
+                code = ""
+                title = ""
+                href = ""
+
+    if (type and code and title and href and filename):
+        filename = code + " - " + title.replace("/", "-").replace(".", "") + ".pdf"
+        logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, href, filename))
+
+        if old_code == "" or old_code == code:
+            tmpPages[title] = href, filename
+
+            # add the links to the page structure
+            updateAipPageLinks (type, code, dromeMapping[code], tmpPages)
+        elif old_code != code:
+            # add the links to the page structure
+            updateAipPageLinks (type, old_code, dromeMapping[old_code], tmpPages)
+
+            tmpPages = {}
+            tmpPages[title] = href, filename
+
+            # add the links to the page structure
+            updateAipPageLinks (type, code, dromeMapping[code], tmpPages)
+
+    return
+
+
+# plugin entry points
+parseMainPage = parseMainPageES
+parseDromePage = None
@@ -0,0 +1,142 @@
+##################################################################
+#
+# FI - Finland AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+import urllib.parse
+
+from aip.core import adType2, adType3, addAipPage, getWebPage, logger, wantDrome
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "Finland"
+regionUrl = "https://ais.fi"
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    logger.info ("WARNING - Using hard coded URL. Update to latest")
+    return "{0}/eaip/005-2023_2023_10_05".format(aipRegionUrl)
+
+
+#
+# parse the main FI AIP page to get list of Aerodromes and their
+# associated information pages, yielding a drome page job for each
+#
+def parseMainPageFI ( aipBaseUrl, aipRegion ):
+    aipMainPage = "{0}/eAIP/menu.html".format(aipBaseUrl)
+
+    # get site page
+    html = getWebPage ( "Aip",  aipRegion, aipMainPage )
+
+    # loop through all the link tags
+    type = ""
+    for link in html.find_all("a"):
+        title = ""
+        href = ""
+        id = ""
+        code = ""
+        name = ""
+
+        if ("title" in link.attrs):
+            title = link["title"]
+            if ("AD  " == title[:4]):
+                code = title[6:10]
+            else:
+                code = title[5:9]
+            if ("Unco" == code):
+                continue
+        if ("href" in link.attrs):
+            href = link["href"]
+        if ("id" in link.attrs):
+            id = link["id"]
+            if ("AD 2en-GB" == id):
+                type = adType2
+                continue
+            if ("AD 3en-GB" == id):
+                type = adType3
+                continue
+
+        # loop through all the span tags in the link tag
+        for span in link.find_all("span"):
+            if ("class" not in span.attrs):
+                continue
+            if ( "Number" in span["class"] ):
+                name = span.get_text().strip()
+    
+        if (type == adType2):
+            if ("AD 2 " not in title):
+                if ("AD  2 " not in title):
+                    continue
+            if ("AD 2 " not in name):
+                if ("AD  2 " not in name):
+                    continue
+        if (type == adType3):
+            if ("AD 3 " not in title):
+                continue
+            if ("AD 3 " not in name):
+                continue
+
+        # check if this is a valid link we want
+        if (name and href and code and type and wantDrome(type, code)):
+            new_name = name[12:]
+            if ("AD  " in name):
+                new_name = name[13:]
+
+            new_href = aipBaseUrl + "/eAIP/" + urllib.parse.quote(href.split("#")[0])
+            # check if its a dupe and do not parse drome page if it is
+            if ( addAipPage (type, code, new_name, new_href) ):
+                yield type, code, new_name, aipBaseUrl, new_href
+
+    return
+
+
+#
+# parse the FI AIP airodrome page to get list of PDF chart files that
+# are available for that airodrome
+#
+def parseDromePageFI ( type, code, baseUrl, html ):
+    pdfPages = {}
+    for tr in html.find_all("tr"):
+        title = ""
+        href = ""
+        if ("id" in tr.attrs):
+            id = tr["id"]
+            if (type == adType2):
+                if ("AD 2 " not in id):
+                    if ("AD  2 " not in id):
+                        continue
+            if (type == adType3):
+                if ("AD 3 " not in id):
+                    continue
+        else:
+            continue
+
+        for td in tr.find_all("td"):
+            for span in td.find_all("span"):
+                title = span.get_text()
+
+            for link in td.find_all("a"):
+                if ("href" in link.attrs):
+                    href = link["href"]
+
+            #logger.debug ("## TITLE : " + title + " ## HREF : " + href + " ##")
+
+        # check we have both parts
+        if (title and href):
+            new_href = baseUrl + href[2:]
+            filename = code + " - " + title.replace("/", "-") + ".pdf"
+            pdfPages[title] = new_href, filename
+            logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, new_href, filename))
+
+    return pdfPages
+
+
+# plugin entry points
+parseMainPage = parseMainPageFI
+parseDromePage = parseDromePageFI
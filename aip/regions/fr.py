@@ -0,0 +1,162 @@
+##################################################################
+#
+# FR - France AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+import datetime
+import re
+
+from aip.core import adType2, adType3, addAipPage, fetchWebPage, getDivBytes, logger, parseWebPage, traceSpan, wantDrome
+
+
+# markup with no tags in it for the parser, and the menu links and the
+# start of the graphic-box divs holding the charts
+hiddenMarkupPattern = re.compile(rb"<!--.*?-->|<script\b.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+menuLinkPattern = re.compile(rb"<a\b.*?</a\s*>", re.IGNORECASE | re.DOTALL)
+graphicBoxPattern = re.compile(rb"(?i:<div\s(?:[^>]*\s)?class\s*=\s*[\"']\s*)graphic-box[\s\"']")
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "France"
+regionUrl = "https://www.sia.aviation-civile.gouv.fr/dvd"
+
+# the AIP is published per AIRAC cycle, not only the live AIP
+perCycle = True
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    releaseAlt = datetime.datetime.strptime(cycle["release"], "%Y-%m-%d").strftime("%d_%b_%Y").upper()
+    return "{0}/eAIP_{1}/FRANCE/AIRAC-{2}".format(aipRegionUrl, releaseAlt, cycle["release"])
+
+
+#
+# get the links of the FR AIP menu page bytes, all the menu parser reads
+#
+def getMenuLinksFR ( page ):
+    return b"\n".join(menuLinkPattern.findall(hiddenMarkupPattern.sub(b"", page)))
+
+
+#
+# parse the main FR AIP page to get list of Aerodromes and their
+# associated information pages, yielding a drome page job for each. Only
+# the links are parsed, not the whole menu page
+#
+def parseMainPageFR ( aipBaseUrl, aipRegion ):
+    aipMainPage = "{0}/html/eAIP/FR-menu-fr-FR.html".format(aipBaseUrl)
+
+    # get site page
+    page = fetchWebPage ( "Aip",  aipRegion, aipMainPage )
+    with traceSpan ("parse " + aipRegion, "parse", code = aipRegion, url = aipMainPage):
+        html = parseWebPage(getMenuLinksFR(page))
+
+    yield from parseMenuFR ( html, aipBaseUrl )
+
+    return
+
+
+#
+# parse the links of the FR AIP menu page, yielding a drome page job for
+# each aerodrome
+#
+def parseMenuFR ( html, aipBaseUrl ):
+    # loop through all the link tags
+    type = ""
+    for link in html.find_all("a"):
+        title = ""
+        href = ""
+        id = ""
+        code = ""
+        name = " ".join(link.get_text().split())[5:]
+        if ("href" in link.attrs):
+            href = link["href"]
+        if ("id" in link.attrs):
+            id = link["id"]
+            if ("AD-2plus" == id):
+                type = adType2
+            elif ("AD-3plus" == id):
+                type = adType3
+            else:
+                idSplit = id.split(".")
+                if len(idSplit) == 3:
+                    code = idSplit[2]
+
+        # loop through all the span tags in the link tag
+        for span in link.find_all("span"):
+            if ("class" not in span.attrs):
+                continue
+            if ( "Number" in span["class"] ):
+                title = span.get_text().strip()
+
+        #logger.debug (title + "==" + code + "==" + href + "==" + type)
+
+        # check if this is a valid link we want
+        if (not title and href != "#" and code and wantDrome(type, code)):
+            new_href = aipBaseUrl + "/html/eAIP/" + href.replace("#" + id, "")
+            addAipPage (type, code, name, new_href)
+            yield type, code, name, aipBaseUrl, new_href
+
+    return
+
+
+#
+# parse the FR AIP airodrome page to get list of PDF chart files that
+# are available for that airodrome
+#
+def parseDromePageFR ( type, code, baseUrl, html ):
+    pdfPages = {}
+    for div in html.find_all("div"):
+        # check if we are in the charts section
+        if ("class" in div.attrs):
+            clas = div["class"][0]
+            if (clas != "graphic-box"):
+                continue
+        else:
+            continue
+
+        # in charts section so parse the table
+        title = ""
+        href = ""
+        for link in div.find_all("a"):
+            # grab the link title and strip out the "AD 2 xxxx " bit at the start
+            title = link.get_text()[10:]
+            href = link["href"]
+
+            # check we have both parts
+            if (title and href):
+                new_href = baseUrl + "/html/eAIP/" + href.replace(" ", "%20")
+                filename = code + " - " + title + ".pdf"
+                pdfPages[title] = new_href, filename
+                logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, new_href, filename))
+
+    return pdfPages
+
+
+#
+# get the chart section of a drome page's bytes, the graphic-box divs the
+# parser reads, without parsing the page. Nested graphic-box divs are
+# already in the div holding them
+#
+def getDromeSectionFR ( type, code, page ):
+    page = hiddenMarkupPattern.sub(b"", page)
+    sections = []
+    end = 0
+    for match in graphicBoxPattern.finditer(page):
+        if match.start() < end:
+            continue
+        sections.append(getDivBytes(page, match.start()))
+        end = match.start() + len(sections[-1])
+
+    return b"".join(sections) if sections else None
+
+
+# plugin entry points
+parseMainPage = parseMainPageFR
+parseDromePage = parseDromePageFR
+getDromeSection = getDromeSectionFR
+parseSectionOnly = True
@@ -0,0 +1,104 @@
+##################################################################
+#
+# IE - Ireland AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+from aip.core import adType2, addAipPage, getWebPage, logger, wantDrome
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "Ireland"
+regionUrl = "http://iaip.iaa.ie"
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    return "{0}/iaip".format(aipRegionUrl)
+
+
+#
+# parse the main IE AIP page to get list of Aerodromes and their
+# associated information pages, yielding a drome page job for each
+#
+def parseMainPageIE ( aipBaseUrl, aipRegion ):
+    aipMainPage = "{0}/aip_directory.htm".format(aipBaseUrl)
+
+    # get site page
+    html = getWebPage ( "Aip",  aipRegion, aipMainPage )
+
+    # loop through all the table tags
+    for tr in html.find_all("tr"):
+        href = ""
+        code = ""
+        name = ""
+        type = ""
+
+        # only rows with cells hold drome links, scan the links once per row
+        if not tr.find("td"):
+            continue
+
+        for link in tr.find_all("a"):
+            text = link.get_text()
+            if "Chart Information" in text:
+                href = link["href"]
+                code = href.split("_")[1].upper()
+                # fudge for ireland west link
+                if len(text) > 19:
+                    name = text[:(len(text) - 18)]
+                type = adType2
+            else:
+                # fudge for ireland west link
+                name = text.strip()
+
+        #logger.debug (name + "==" + code + "==" + href + "==" + type)
+
+        # check if this is a valid link we want
+        if (href and code and wantDrome(type, code)):
+            new_href = aipBaseUrl + "/" + href
+            addAipPage (type, code, name, new_href)
+            yield type, code, name, aipBaseUrl, new_href
+
+    return
+
+
+#
+# parse the IE AIP airodrome page to get list of PDF chart files that
+# are available for that airodrome
+#
+def parseDromePageIE ( type, code, baseUrl, html ):
+    pdfPages = {}
+    for tr in html.find_all("tr"):
+        title = ""
+        href = ""
+
+        # only rows with cells hold charts
+        if not tr.find("td"):
+            continue
+
+        # grab the link title from the last paragraph in the row
+        paragraphs = tr.find_all("p")
+        if paragraphs:
+            title = paragraphs[-1].get_text().replace("\r", "").replace("\n", "")
+        # grab the last link href in the row
+        links = tr.find_all("a", href=True)
+        if links:
+            href = links[-1]["href"]
+
+        # check we have both parts
+        if (title and href):
+            new_href = baseUrl + "/" + href
+            filename = code + " - " + title.replace("/", "-") + ".pdf"
+            pdfPages[title] = new_href, filename
+            logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, new_href, filename))
+
+    return pdfPages
+
+
+# plugin entry points
+parseMainPage = parseMainPageIE
+parseDromePage = parseDromePageIE
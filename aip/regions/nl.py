@@ -0,0 +1,41 @@
+##################################################################
+#
+# NL - Netherlands AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+from aip.regions.eaip import getSpecParsers, getSpecSection
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "Netherlands"
+regionUrl = "https://eaip.lvnl.nl"
+
+# the AIP is published per AIRAC cycle, not only the live AIP
+perCycle = True
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    return "{0}/web/{1}-AIRAC".format(aipRegionUrl, cycle["published"])
+
+
+# extraction spec, see aip/regions/eaip.py for the rules
+spec = {
+    "menuPage": "html/eAIP/EH-menu-en-GB.html",
+    "menuTitle": "Numbering",
+    "menuCode": "prefix",
+    "menuName": "offset",
+    "skipHrefs": ("#",),
+    "sectionCase": False,
+    "chartTitle": "cell",
+    "titleReplace": ()
+}
+
+# plugin entry points
+parseMainPage, parseDromePage = getSpecParsers("NL", spec)
+getDromeSection = getSpecSection("NL", spec)
@@ -0,0 +1,39 @@
+##################################################################
+#
+# NO - Norway AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+from aip.regions.eaip import getSpecParsers, getSpecSection
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "Norway"
+regionUrl = "https://ais.avinor.no/no"
+
+# the AIP is published per AIRAC cycle, not only the live AIP
+perCycle = True
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    return "{0}/AIP/View/{1}/{2}-AIRAC".format(aipRegionUrl, 108 + cycle["offset"], cycle["release"])
+
+
+# extraction spec, see aip/regions/eaip.py for the rules
+spec = {
+    "menuPage": "html/eAIP/EN-menu-en-GB.html",
+    "menuName": "afterCode",
+    "dropSpan": "sdParams",
+    "skipHrefs": ("",),
+    "skipTexts": ("", "+"),
+    "titleReplace": (("\r", ""), ("\n", ""), ("&", "and"))
+}
+
+# plugin entry points
+parseMainPage, parseDromePage = getSpecParsers("NO", spec)
+getDromeSection = getSpecSection("NO", spec)
@@ -0,0 +1,135 @@
+##################################################################
+#
+# RU - Russia AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+import re
+
+from aip.core import adType2, adType3, addAipPage, getWebPage, logger, updateAipPageLinks, wantDrome
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "Russia"
+regionUrl = "http://www.caiga.ru"
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    return "{0}/common/AirInter/validaip".format(aipRegionUrl)
+
+
+#
+# The RU menu is built by script calls, one per line, like
+#   ItemBegin("id", "img", "UUEE. MOSCOW/Sheremetyevo");
+#   ItemLink("../pdf/UUEE.pdf", "(1) Aerodrome chart");
+#   ItemEnd();
+# this pattern picks out all three call types in a single pass over the
+# script text, giving the call name and its raw argument text
+#
+menuScriptPattern = re.compile(r"^(ItemBegin|ItemLink|ItemEnd)(?:\((.*)\))?", re.MULTILINE)
+
+
+#
+# Common routine to split a RU menu script call's raw arguments into
+# its fields, with the quotes removed
+#
+def menuScriptArgs ( args ):
+    return args.replace("\", ", ",").replace("\"", "").split(",")
+
+
+#
+# parse the main RU AIP page to get list of Aerodromes and their
+# associated information pages
+#
+def parseMainPageRU ( aipBaseUrl, aipRegion ):
+    aipMainPage = "{0}/html/menueng.htm".format(aipBaseUrl)
+
+    # get site page
+    html = getWebPage ( "Aip",  aipRegion, aipMainPage )
+
+    # loop through all the menu scripts
+    for script in html.find_all("script"):
+        if ("language" in script.attrs):
+            continue
+
+        itemBegin = ""
+        skipping = False
+        type = ""
+        code = ""
+        name = ""
+        tmpPages = {}
+        for call, args in menuScriptPattern.findall(script.string or ""):
+            if ("ItemBegin" == call):
+                itemBegin = menuScriptArgs(args)
+                if len(itemBegin) < 3:
+                    itemBegin = ""
+                    continue
+                if type in (None, ""):
+                    if itemBegin[2] == "AD 2. Aerodromes":
+                        logger.debug ("Found AERODROME section.")
+                        type = adType2
+                        skipping = False
+                    else:
+                        itemBegin = ""
+                    continue
+                if itemBegin[2] == "AD 3 Helidromes":
+                    logger.debug ("Found HELIPORT section.")
+                    type = adType3
+                    skipping = False
+                    continue
+                elif itemBegin[2] in ("AD 4 Other aerodromes", "AD 4. Other aerodromes", "Aerodromes classes 4D"):
+                    logger.debug ("Found OTHER section.")
+                    # not interested in anything not AD 2 or AD 3, so lets stop parsing
+                    itemBegin = ""
+                    type = ""
+                    continue
+                # only interested if its names properly
+                if len(itemBegin[2]) > 4 and itemBegin[2][4] == ".":
+                    code = itemBegin[2][:4]
+                    name = itemBegin[2][5:].strip()
+
+                    # the site repeats drome data multiple times, so skip the
+                    # whole block if we already have this drome or it is
+                    # filtered out
+                    skipping = not (code and name and wantDrome(type, code) and addAipPage(type, code, name, "", True))
+                    if skipping:
+                        logger.debug ("    Skipping block for [{0}]".format(code))
+
+                if skipping:
+                    itemBegin = ""
+                continue
+
+            # links and block ends only count inside a block we want
+            if (not itemBegin):
+                continue
+
+            if ("ItemLink" == call):
+                itemLink = menuScriptArgs(args)
+                href = itemLink[0]
+                title = "".join(itemLink[1:])
+                if "(" in title:
+                    title = "".join(title.split(") ")[1:])
+                # check we have both parts
+                if (code and title and href):
+                    new_href = aipBaseUrl + "/" + href.replace("../", "")
+                    filename = code + " - " + title.replace(".", "") + ".pdf"
+                    tmpPages[title] = new_href, filename
+                    logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, new_href, filename))
+            else:
+                # add the links to the page structure
+                updateAipPageLinks (type, code, name, tmpPages)
+
+                itemBegin = ""
+                tmpPages = {}
+
+    return
+
+
+# plugin entry points
+parseMainPage = parseMainPageRU
+parseDromePage = None
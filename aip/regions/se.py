@@ -0,0 +1,90 @@
+##################################################################
+#
+# SE - Sweden AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+from aip.core import adType2, addAipPage, getWebPage, logger, wantDrome
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "Sweden"
+regionUrl = "https://aro.lfv.se"
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    return "{0}".format(aipRegionUrl)
+
+
+#
+# parse the main SE AIP page to get list of Aerodromes and their
+# associated information pages, yielding a drome page job for each
+#
+def parseMainPageSE ( aipBaseUrl, aipRegion ):
+    aipMainPage = "{0}/Editorial/View/IAIP?folderId=19".format(aipBaseUrl)
+
+    # get site page
+    html = getWebPage ( "AIP",  aipRegion, aipMainPage )
+
+    # loop through all the link tags
+    type = adType2
+    for table in html.find_all("table"):
+        #logger.debug (table)
+        href = ""
+        code = ""
+        name = ""
+        for tr in table.find_all("tr"):
+            for td in tr.find_all("td"):
+                for link in td.find_all("a"):
+                    if ("class" in link.attrs):
+                        if "sortableFolder--rightArrow" in link["class"]:
+                            name = link.get_text()
+                    else:
+                        code = link.get_text()
+                        href = link["href"]
+
+            #logger.debug (code + "==" + href + "==" + name)
+
+            # check if this is a valid link we want
+            if (href and code and wantDrome(type, code)):
+                new_href = aipBaseUrl + "/" + href
+                addAipPage (type, code, name, new_href)
+                yield type, code, name, aipBaseUrl, new_href
+
+    return
+
+
+#
+# parse the SE AIP airodrome page to get list of PDF chart files that
+# are available for that airodrome
+#
+def parseDromePageSE ( type, code, baseUrl, html ):
+    pdfPages = {}
+    for section in html.find_all("section"):
+        for li in section.find_all("li"):
+            title = ""
+            href = ""
+            for link in li.find_all("a"):
+                href = link["href"]
+            for span in li.find_all("span"):
+                if "document-name" == span["class"][0]:
+                    title = span.get_text()
+
+            # check we have both parts
+            if (title and href):
+                new_href = baseUrl + "/" + href
+                filename = code + " - " + title + ".pdf"
+                pdfPages[title] = new_href, filename
+                logger.debug ("    {0} == {1} == {2} == {3}".format(code, title, new_href, filename))
+
+    return pdfPages
+
+
+# plugin entry points
+parseMainPage = parseMainPageSE
+parseDromePage = parseDromePageSE
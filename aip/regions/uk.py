@@ -0,0 +1,35 @@
+##################################################################
+#
+# UK - United Kingdom AIP region plugin for aipParser.
+#
+# See aip/regions/__init__.py for what a region plugin provides.
+#
+##################################################################
+
+from aip.regions.eaip import getSpecParsers, getSpecSection
+
+
+# region name, used in the output filenames, and AIP site
+regionName = "UK"
+regionUrl = "https://www.aurora.nats.co.uk/htmlAIP/Publications"
+
+# the AIP is published per AIRAC cycle, not only the live AIP
+perCycle = True
+
+
+#
+# AIP base URL for an AIRAC cycle, the pages hang from it
+#
+def getAipBaseUrl ( aipRegionUrl, cycle ):
+    return "{0}/{1}-AIRAC".format(aipRegionUrl, cycle["release"])
+
+
+# extraction spec, see aip/regions/eaip.py for the rules
+spec = {
+    "menuPage": "html/eAIP/EG-menu-en-GB.html",
+    "nameSpan": "SD"
+}
+
+# plugin entry points
+parseMainPage, parseDromePage = getSpecParsers("UK", spec)
+getDromeSection = getSpecSection("UK", spec)
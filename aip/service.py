@@ -0,0 +1,207 @@
+##################################################################
+#
+# Asyncio API to generate regions from inside a service, e.g.
+#
+#   from aip.service import generateRegionJob
+#   result = await generateRegionJob("UK", timeout = 1800, onEvent = print)
+#
+# Each region is generated by aipParser in its own process, the crawler
+# keeps its state in module globals and ends a failed run with exit, so
+# a process per job keeps concurrent jobs apart and a failed job from
+# taking the service down. The process is driven with asyncio, so a job
+# needs no thread in the service, and its progress events are streamed
+# back as they happen. Cancelling a job, or its timeout running out,
+# kills its process.
+#
+# The crawl itself is not done in the service. Each job's process fetches
+# its pages with urllib, one connection per request, so no connections
+# are shared between jobs or kept alive. An in-process crawl on a shared
+# asyncio connection pool would need the crawler rewritten, and is out of
+# scope here.
+#
+##################################################################
+
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import sys
+
+
+# most region jobs to run at once, the rest wait their turn. Set it with
+# setMaxRegionJobs before the first job
+maxRegionJobs = 4
+regionJobs = None
+
+# numbers each job's log file, so concurrent jobs in the same folder do not
+# write over each other's log
+jobNumbers = itertools.count(1)
+
+# console log lines are "LEVEL   : message"
+logLevels = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+#
+# Common routine to set how many region jobs run at once
+#
+def setMaxRegionJobs ( jobs ):
+    global maxRegionJobs, regionJobs
+
+    maxRegionJobs = jobs
+    regionJobs = None
+
+    return
+
+
+#
+# Common routine to turn a line of aipParser output into an event. Progress
+# events are JSON lines on stdout, log lines on stderr become log events.
+#
+def getOutputEvent ( line, isLog ):
+    line = line.rstrip("\r\n")
+    if not isLog:
+        try:
+            return json.loads(line)
+        except ValueError:
+            pass
+
+    level, _, message = line.partition(":")
+    if level.strip() in logLevels:
+        return { "event" : "log", "level" : level.strip(), "message" : message.strip() }
+
+    return { "event" : "log", "level" : "INFO", "message" : line }
+
+
+#
+# Common routine to read a stream of the aipParser process onto the event
+# queue, ending with None
+#
+async def readOutputEvents ( stream, isLog, events ):
+    try:
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            await events.put(getOutputEvent(line.decode("utf8", "replace"), isLog))
+    finally:
+        await events.put(None)
+
+
+#
+# Generate a region, yielding its progress events as they happen. Each
+# event is a dict with an "event" of:
+#   queued    waiting for a free region job
+#   start     crawling "cycle" of "region"
+#   drome     a drome's "charts" are found, with its "type", "code" and "name"
+#   crawled   all the drome pages are done
+#   output    a JSON "file" was written
+#   log       a "level" and "message" from the log
+#   finished  the run is done, with its "peakMb"
+# The run fails with RuntimeError, or asyncio.TimeoutError if it is not
+# done within timeout seconds, waiting for a free region job included.
+# options are more aipParser arguments, and the output files are written
+# to folder, the current folder if not given. Each job logs to its own
+# file in folder, which is kept only if the run fails.
+#
+async def streamRegionJob ( region, cycle = None, options = (), folder = None, timeout = None ):
+    global regionJobs
+
+    if regionJobs is None:
+        regionJobs = asyncio.Semaphore(maxRegionJobs)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout else None
+
+    launcher = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aipParser.py")
+    logFilename = os.path.join(folder or os.getcwd(), "aipParser {0} {1}-{2}.log".format(region, os.getpid(), next(jobNumbers)))
+    command = [sys.executable, launcher, "--region", region, "--events", "--log", logFilename]
+    if cycle:
+        command += ["--cycle", cycle]
+    command += list(options)
+
+    if regionJobs.locked():
+        yield { "event" : "queued", "region" : region }
+
+    remaining = deadline - loop.time() if deadline is not None else None
+    try:
+        await asyncio.wait_for(regionJobs.acquire(), remaining)
+    except asyncio.TimeoutError:
+        raise asyncio.TimeoutError("Timed out waiting to generate {0}".format(region))
+
+    try:
+        process = await asyncio.create_subprocess_exec(*command, cwd = folder, stdin = asyncio.subprocess.DEVNULL,
+                                                       stdout = asyncio.subprocess.PIPE, stderr = asyncio.subprocess.PIPE)
+        events = asyncio.Queue()
+        readers = [asyncio.ensure_future(readOutputEvents(process.stdout, False, events)),
+                   asyncio.ensure_future(readOutputEvents(process.stderr, True, events))]
+        failure = "no error was logged"
+        inTraceback = False
+        try:
+            running = len(readers)
+            while running:
+                remaining = deadline - loop.time() if deadline is not None else None
+                event = await asyncio.wait_for(events.get(), remaining)
+                if event is None:
+                    running -= 1
+                    continue
+                # keep the last error, a logged traceback ends with the exception
+                if event["event"] == "log":
+                    if event["level"] in ("ERROR", "CRITICAL"):
+                        failure = event["message"]
+                        inTraceback = failure.startswith("Traceback")
+                    elif inTraceback and event["message"]:
+                        failure = event["message"]
+                yield event
+
+            remaining = deadline - loop.time() if deadline is not None else None
+            returnCode = await asyncio.wait_for(process.wait(), remaining)
+            if returnCode != 0:
+                raise RuntimeError("Generating {0} failed with exit code {1}: {2}, see {3}".format(region, returnCode, failure, logFilename))
+        finally:
+            # cancelled, timed out or failed, the process goes with the job
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            for reader in readers:
+                reader.cancel()
+
+        # a successful run's log has nothing the events did not give
+        try:
+            os.remove(logFilename)
+        except OSError:
+            pass
+    finally:
+        regionJobs.release()
+
+    return
+
+
+#
+# Generate a region, returning a summary of the run once it is done. Each
+# progress event is passed to onEvent as it happens, which may be a plain
+# function or a coroutine function. See streamRegionJob for the arguments.
+#
+async def generateRegionJob ( region, cycle = None, options = (), folder = None, timeout = None, onEvent = None ):
+    result = { "region" : region, "cycle" : None, "dromes" : 0, "charts" : 0, "outputs" : [], "peakMb" : None }
+
+    # the canary dromes are reported twice, so charts are kept by drome
+    charts = {}
+    async for event in streamRegionJob(region, cycle, options, folder, timeout):
+        if event["event"] == "start":
+            result["cycle"] = event["cycle"]
+        elif event["event"] == "drome":
+            charts[(event["type"], event["code"])] = event["charts"]
+            result["dromes"] = len(charts)
+            result["charts"] = sum(charts.values())
+        elif event["event"] == "output":
+            result["outputs"].append(event["file"])
+        elif event["event"] == "finished":
+            result["peakMb"] = event["peakMb"]
+
+        if onEvent is not None:
+            called = onEvent(event)
+            if inspect.isawaitable(called):
+                await called
+
+    return result
@@ -0,0 +1,374 @@
+##################################################################
+#
+# Synthetic eAIP sites for scale testing. Writes a site to disk in the
+# UK, NO, NL or FR menu layout, with one drome page per aerodrome holding
+# an AD 2.24 (or AD 3.23) chart table, or FR graphic-box chart links,
+# serves it over HTTP as a stand in for the real site, and benchmarks
+# aipParser against growing sites. The drome page parsers can also be
+# benchmarked on their own, parsing whole pages against only the chart
+# sections, to check the two give the same charts.
+#
+# Example run lines:
+#   python -m aip.synthetic --generate site --layout UK --dromes 1000 --charts 20
+#   python -m aip.synthetic --serve site --port 8765
+#   python -m aip.synthetic --benchmark --layout NO --sizes 10 100 1000 10000
+#   python -m aip.synthetic --parsers --layout FR --dromes 500 --page-kb 64
+#
+##################################################################
+
+import argparse
+import datetime
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from aip.core import adType2, adType3, aipPages, getAiracCycle, getCycleDates, getRegionPlugin, logger, effectiveDates, parseWebPage
+
+
+#
+# Menu layouts of the eAIP sites, the code prefix, the menu page and drome
+# page names and how a drome menu link is written, so the region's parser
+# reads it
+#
+syntheticLayouts = {
+    "UK" : ("EG", "EG-menu-en-GB.html", "EG-AD-{ad}.{code}-en-GB.html", '<a id="AD-{ad}.{code}" href="../eAIP/{page}#AD-{ad}.{code}">{code} <span class="SD">{name}</span></a>'),
+    "NO" : ("EN", "EN-menu-en-GB.html", "EN-AD-{ad}.{code}-en-GB.html", '<a id="AD-{ad}.{code}" href="../eAIP/{page}#AD-{ad}.{code}">{code} {name}<span class="sdParams">params</span></a>'),
+    "NL" : ("EH", "EH-menu-en-GB.html", "EH-AD-{ad}.{code}-en-GB.html", '<a id="AD-{ad}.{code}" href="../eAIP/{page}#AD-{ad}.{code}">{code} - {name}</a>'),
+    "FR" : ("LF", "FR-menu-fr-FR.html", "FR-AD-{ad}.{code}-fr-FR.html", '<a id="AD-{ad}.FR.{code}" href="{page}#AD-{ad}.FR.{code}">{code}  {name}</a>')
+}
+
+# chart kinds the chart titles are made from
+syntheticCharts = [ "AERODROME CHART", "AIRCRAFT PARKING DOCKING CHART", "GROUND MOVEMENT CHART", "STANDARD DEPARTURE CHART",
+                    "STANDARD ARRIVAL CHART", "INSTRUMENT APPROACH CHART RNP RWY", "VISUAL APPROACH CHART", "PRECISION APPROACH TERRAIN CHART" ]
+
+# AD 2 section titles of the synthetic menu's tree nodes
+syntheticSections = [ "AERODROME LOCATION INDICATOR AND NAME", "AERODROME GEOGRAPHICAL AND ADMINISTRATIVE DATA", "OPERATIONAL HOURS",
+                      "HANDLING SERVICES AND FACILITIES", "RUNWAY PHYSICAL CHARACTERISTICS", "DECLARED DISTANCES", "CHARTS RELATED TO AN AERODROME" ]
+
+# line of filler text for the other AD 2 sections, real drome pages are
+# mostly text and tables before the charts
+syntheticFiller = "<tr><td><p>{0}</p></td><td><p>Synthetic aerodrome data to pad the page to a realistic size.</p></td></tr>"
+
+
+#
+# Common routine to get the 4 letter code of the index'th synthetic drome,
+# counting up from the layout's prefix, e.g. EGAA, EGAB, ...
+#
+def getSyntheticCode ( prefix, index ):
+    value = 0
+    for letter in prefix + "AA":
+        value = value * 26 + ord(letter) - ord("A")
+    value = (value + index) % 26 ** 4
+
+    code = ""
+    for _ in range(4):
+        code = chr(ord("A") + value % 26) + code
+        value //= 26
+
+    return code
+
+
+#
+# Common routine to get the HTML of a synthetic drome page
+#
+def getSyntheticDromePage ( layout, code, ad, charts, pageKb ):
+    filler = []
+    size = 0
+    while size < pageKb * 1024:
+        filler.append(syntheticFiller.format(len(filler)))
+        size += len(filler[-1])
+
+    if layout == "FR":
+        # chart links in graphic-box divs, with the variations of them the
+        # parser has to cope with: other classes, nesting, entities, and
+        # markup it does not see in comments and scripts
+        boxes = []
+        for index in range(charts):
+            title = "AD {0} {1} {2} {3}".format(ad, code, syntheticCharts[index % len(syntheticCharts)], index + 1)
+            link = '<a href="Cartes/{0}/{1}.pdf">{1}</a>'.format(code, title)
+            if index % 5 == 1:
+                boxes.append('<div class="graphic-box wide"><p>{0}</p></div>'.format(link))
+            elif index % 5 == 2:
+                boxes.append('<DIV CLASS="graphic-box"><div class="graphic-box">{0}</div></DIV>'.format(link.replace("CHART", "CHART &amp; NOTES")))
+            elif index % 5 == 3:
+                boxes.append('<div class="figure graphic-box">{0}</div>'.format(link))
+            else:
+                boxes.append('<div class="graphic-box">{0}</div>'.format(link))
+        boxes.append('<!-- <div class="graphic-box"><a href="old.pdf">AD 2 OLD CHART</a></div> -->')
+        boxes.append('<script>var box = \'<div class="graphic-box"><a href="x.pdf">AD 2 SCRIPT</a></div>\';</script>')
+        return ('<html><head><title>{0}</title></head><body>'
+                '<div id="{0}-AD-{1}.1"><table>{2}</table></div>'
+                '<div id="{0}-AD-{1}.24">{3}</div>'
+                '</body></html>').format(code, ad, "".join(filler), "".join(boxes))
+
+    rows = []
+    for index in range(charts):
+        title = "{0} {1} - ICAO".format(syntheticCharts[index % len(syntheticCharts)], index + 1)
+        rows.append('<tr><td><p>{0}</p></td><td><a href="../graphics/{1}_{2}.pdf">{1} {2}</a></td></tr>'.format(title, code, index + 1))
+
+    section = "{0}-AD-2.24".format(code) if ad == 2 else "{0}-AD-3.23".format(code)
+    return ('<html><head><title>{0}</title></head><body>'
+            '<div id="{0}-AD-{1}.1"><table>{2}</table></div>'
+            '<div id="{3}"><table>{4}</table></div>'
+            '</body></html>').format(code, ad, "".join(filler), section, "".join(rows))
+
+
+#
+# Common routine to get the dromes of a synthetic site, as a list of
+# (AD number, code, name, drome page name)
+#
+def getSyntheticDromes ( layout, dromes, heliports ):
+    prefix, menuPage, dromePage, menuLink = syntheticLayouts[layout]
+
+    return [(ad, getSyntheticCode(prefix, index), "SYNTHETIC {0} {1}".format("AERODROME" if ad == 2 else "HELIPORT", index + 1),
+             dromePage.format(ad = ad, code = getSyntheticCode(prefix, index)))
+            for ad, count, first in ((2, dromes, 0), (3, heliports, dromes)) for index in range(first, first + count)]
+
+
+#
+# Common routine to get the HTML of a synthetic menu page. Like a real
+# eAIP menu it is mostly tree markup, each drome's link in a tree node with
+# a toggle image and its AD 2 or AD 3 sections, which are not links. Section
+# headers have a title, so the menu parsers skip them
+#
+def getSyntheticMenu ( layout, syntheticDromes ):
+    prefix, menuPage, dromePage, menuLink = syntheticLayouts[layout]
+
+    nodes = []
+    section = None
+    for ad, code, name, page in syntheticDromes:
+        if ad != section:
+            if section is not None:
+                nodes.append('</div>')
+            section = ad
+            nodes.append('<div class="H2" id="AD-{0}">'.format(ad))
+            nodes.append('<a id="AD-{0}plus" href="#" title="AD {0}"><span class="Numbering Number">AD {0}</span></a>'.format(ad))
+
+        nodes.append('<div class="Hx" id="AD-{0}.{1}details">'.format(ad, code))
+        nodes.append('<span class="toggle" onclick="showHide(\'AD-{0}.{1}details\')"><img src="../images/plus.gif" alt="+" border="0"/></span>'.format(ad, code))
+        nodes.append(menuLink.format(ad = ad, code = code, name = name, page = page))
+        nodes.append('<div class="H4" style="display: none">')
+        for index in range(24 if ad == 2 else 23):
+            nodes.append('<div class="H5"><span class="Numbering">{0} AD {1}.{2}</span> <span class="SubTitle">{3}</span></div>'.format(code, ad, index + 1, syntheticSections[index % len(syntheticSections)]))
+        nodes.append('</div></div>')
+    if section is not None:
+        nodes.append('</div>')
+
+    return ('<html><head><title>Menu</title>\n'
+            '<style type="text/css">.H4 {{ margin-left: 16px; }} .toggle img {{ cursor: pointer; }}</style>\n'
+            '<script type="text/javascript">function showHide(id) {{ var node = document.getElementById(id).getElementsByTagName("div")[0]; '
+            'node.style.display = node.style.display == "none" ? "block" : "none"; }}</script>\n'
+            '</head><body>\n<div id="menu">\n{0}\n</div>\n</body></html>').format("\n".join(nodes))
+
+
+#
+# Write a synthetic site for a layout and AIRAC cycle below root, in the
+# path the region plugin builds from its site URL, so the site URL to crawl
+# is root's URL plus the layout in lower case. Heliports are AD 3 dromes.
+# Returns the site folder.
+#
+def generateSite ( root, layout, dromes, charts, heliports = 0, pageKb = 8, cycleIndex = None ):
+    prefix, menuPage, dromePage, menuLink = syntheticLayouts[layout]
+    if cycleIndex is None:
+        cycleIndex = getAiracCycle("current", datetime.datetime.now().strftime("%Y-%m-%d"))
+
+    site = os.path.join(root, layout.lower())
+    baseUrl = getRegionPlugin(layout).getAipBaseUrl("", getCycleDates(cycleIndex))
+    pages = os.path.join(site, baseUrl.strip("/"), "html", "eAIP")
+    os.makedirs(pages, exist_ok = True)
+
+    syntheticDromes = getSyntheticDromes(layout, dromes, heliports)
+    for ad, code, name, page in syntheticDromes:
+        with open(os.path.join(pages, page), "w", encoding = "utf8") as file:
+            file.write(getSyntheticDromePage(layout, code, ad, charts, pageKb))
+
+    with open(os.path.join(pages, menuPage), "w", encoding = "utf8") as file:
+        file.write(getSyntheticMenu(layout, syntheticDromes))
+
+    logger.info ("Generated {0} site with {1} aerodromes, {2} heliports and {3} charts each for {4} in {5}".format(layout, dromes, heliports, charts, effectiveDates[cycleIndex][0], site))
+
+    return site
+
+
+#
+# Serve a folder over HTTP from a background thread, as a stand in for
+# the real site. Returns the server, shut it down when done.
+#
+def serveSite ( root, host, port ):
+    # http.server is only needed to serve, so it is loaded here
+    import functools
+    import http.server
+
+    handler = type("SyntheticSiteHandler", (http.server.SimpleHTTPRequestHandler,), {
+                    "log_message" : lambda self, format, *args: logger.debug ("Site {0} - {1}".format(self.address_string(), format % args))
+                  })
+    server = http.server.ThreadingHTTPServer((host, port), functools.partial(handler, directory = root))
+    server.daemon_threads = True
+    logger.info ("Serving {0} on http://{1}:{2}/".format(root, host, server.server_address[1]))
+
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+
+    return server
+
+
+#
+# Crawl a synthetic site with aipParser in its own process and folder,
+# returning the seconds taken, the peak memory in MB from its log and the
+# size of the JSON output in MB
+#
+def runSyntheticCrawl ( layout, siteUrl, cycleIndex, runFolder, crawlArgs ):
+    launcher = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aipParser.py")
+    command = [sys.executable, launcher, "--region", layout, "--base-url", siteUrl, "--cycle", effectiveDates[cycleIndex][0], "--canary", "0"] + crawlArgs
+
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd = runFolder, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, text = True)
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        logger.error (result.stdout)
+        raise RuntimeError("aipParser failed for {0} with exit code {1}".format(siteUrl, result.returncode))
+
+    peakMemory = re.findall(r"Peak memory ([0-9.]+) MB", result.stdout)
+    outputs = [filename for filename in os.listdir(runFolder) if filename.endswith(".json")]
+    outputMb = sum(os.path.getsize(os.path.join(runFolder, filename)) for filename in outputs) / (1024 * 1024)
+
+    return seconds, float(peakMemory[-1]) if peakMemory else None, outputMb
+
+
+#
+# Scaling benchmark, generates and crawls a site of each size in turn and
+# reports the throughput and memory as the site grows
+#
+def runBenchmark ( layout, sizes, charts, pageKb, crawlArgs, host = "127.0.0.1", workFolder = None ):
+    cycleIndex = getAiracCycle("current", datetime.datetime.now().strftime("%Y-%m-%d"))
+
+    with tempfile.TemporaryDirectory(prefix = "aipSynthetic", dir = workFolder) as root:
+        server = serveSite (root, host, 0)
+        results = []
+        try:
+            for size in sizes:
+                siteRoot = os.path.join(root, "site{0}".format(size))
+                runFolder = os.path.join(root, "run{0}".format(size))
+                os.makedirs(runFolder)
+
+                heliports = size // 20
+                generateSite (siteRoot, layout, size, charts, heliports, pageKb, cycleIndex)
+                siteUrl = "http://{0}:{1}/site{2}/{3}".format(host, server.server_address[1], size, layout.lower())
+                seconds, peakMemory, outputMb = runSyntheticCrawl (layout, siteUrl, cycleIndex, runFolder, crawlArgs)
+
+                dromes = size + heliports
+                results.append((dromes, seconds, peakMemory, outputMb))
+                logger.info ("{0} dromes crawled in {1:.1f} seconds".format(dromes, seconds))
+        finally:
+            server.shutdown()
+
+    logger.info ("Benchmark {0} layout, {1} charts per drome, {2} KB pages, {3}".format(layout, charts, pageKb, " ".join(crawlArgs) or "default options"))
+    logger.info ("{0:>8} {1:>9} {2:>9} {3:>10} {4:>10} {5:>10}".format("dromes", "seconds", "dromes/s", "charts/s", "peak MB", "output MB"))
+    for dromes, seconds, peakMemory, outputMb in results:
+        logger.info ("{0:>8} {1:>9.1f} {2:>9.1f} {3:>10.0f} {4:>10} {5:>10.1f}".format(dromes, seconds, dromes / seconds, dromes * charts / seconds,
+                     "{0:.1f}".format(peakMemory) if peakMemory is not None else "-", outputMb))
+
+    return results
+
+
+#
+# Drome page parser benchmark, parses the pages of a synthetic site in
+# memory both whole and, for a plugin with getDromeSection, only their chart
+# section, reporting the cost per aerodrome of each and checking they give
+# the same charts in the same order. For FR the menu is parsed both ways too.
+#
+def runParserBenchmark ( layout, dromes, charts, pageKb, heliports = 0 ):
+    plugin = getRegionPlugin(layout)
+    baseUrl = "http://127.0.0.1/{0}".format(layout.lower())
+    syntheticDromes = getSyntheticDromes(layout, dromes, heliports)
+    pages = [(adType2 if ad == 2 else adType3, code, getSyntheticDromePage(layout, code, ad, charts, pageKb).encode("utf8")) for ad, code, name, page in syntheticDromes]
+    logger.info ("Parsing {0} {1} drome pages of {2:.0f} KB with {3} charts each".format(len(pages), layout, sum(len(page) for type, code, page in pages) / len(pages) / 1024, charts))
+
+    start = time.perf_counter()
+    wholeCharts = [plugin.parseDromePage(type, code, baseUrl, parseWebPage(page)) for type, code, page in pages]
+    wholeSeconds = time.perf_counter() - start
+    logger.info ("    whole page    {0:7.2f} ms per aerodrome".format(wholeSeconds * 1000 / len(pages)))
+
+    sectionParser = getattr(plugin, "getDromeSection", None)
+    if sectionParser is None:
+        logger.info ("    {0} has no getDromeSection, so no chart sections to parse".format(layout))
+        return
+
+    start = time.perf_counter()
+    sectionCharts = []
+    for type, code, page in pages:
+        section = sectionParser(type, code, page)
+        sectionCharts.append(plugin.parseDromePage(type, code, baseUrl, parseWebPage(section)) if section is not None else {})
+    sectionSeconds = time.perf_counter() - start
+    logger.info ("    chart section {0:7.2f} ms per aerodrome, {1:.1f} times faster".format(sectionSeconds * 1000 / len(pages), wholeSeconds / sectionSeconds))
+
+    different = [code for (type, code, page), whole, section in zip(pages, wholeCharts, sectionCharts) if list(whole.items()) != list(section.items())]
+    logger.info ("    {0} of {1} aerodromes give the same charts{2}".format(len(pages) - len(different), len(pages), ", different: " + " ".join(different[:20]) if different else ""))
+
+    if layout == "FR":
+        menu = getSyntheticMenu(layout, syntheticDromes).encode("utf8")
+        menus = []
+        for html in (lambda: parseWebPage(menu), lambda: parseWebPage(plugin.getMenuLinksFR(menu))):
+            for adType in aipPages:
+                aipPages[adType].clear()
+            start = time.perf_counter()
+            menus.append((list(plugin.parseMenuFR(html(), baseUrl)), time.perf_counter() - start))
+        logger.info ("    menu whole {0:.1f} ms, links only {1:.1f} ms, {2}".format(menus[0][1] * 1000, menus[1][1] * 1000, "same dromes" if menus[0][0] == menus[1][0] else "DIFFERENT dromes"))
+
+    return
+
+
+#
+# Command line, everything after -- is passed on to aipParser in the benchmark
+#
+def main ():
+    argv = sys.argv[1:]
+    crawlArgs = []
+    if "--" in argv:
+        crawlArgs = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+
+    parser = argparse.ArgumentParser(description = "Synthetic eAIP sites for scale testing aipParser. Arguments after -- are passed on to aipParser by --benchmark.")
+    parser.add_argument('--generate', metavar='FOLDER', help='Generate a synthetic site below FOLDER')
+    parser.add_argument('--serve', metavar='FOLDER', help='Serve FOLDER over HTTP until interrupted')
+    parser.add_argument('--benchmark', action="store_true", help='Generate and crawl a site of each of the --sizes and report the throughput and memory', default=False)
+    parser.add_argument('--layout', type=str.upper, choices=sorted(syntheticLayouts), help='Menu layout of the site', default="UK")
+    parser.add_argument('--dromes', type=int, help='Number of aerodromes to generate', default=100)
+    parser.add_argument('--heliports', type=int, help='Number of heliports to generate', default=0)
+    parser.add_argument('--charts', type=int, help='Number of charts on each drome page', default=20)
+    parser.add_argument('--page-kb', type=int, help='Size in KB of the other text on each drome page', default=8)
+    parser.add_argument('--parsers', action="store_true", help='Benchmark the drome page parsers on whole pages against chart sections only, and check they agree', default=False)
+    parser.add_argument('--sizes', type=int, nargs='+', help='Numbers of aerodromes to benchmark', default=[10, 100, 1000, 10000])
+    parser.add_argument('--host', help='Address to serve on', default="127.0.0.1")
+    parser.add_argument('--port', type=int, help='Port to serve on', default=8765)
+    parser.add_argument('--work', metavar='FOLDER', help='Folder to generate the benchmark sites in, the system temporary folder if not given')
+    args = parser.parse_args(argv)
+    logger.setLevel(logging.INFO)
+
+    if args.generate:
+        generateSite (args.generate, args.layout, args.dromes, args.charts, args.heliports, args.page_kb)
+    if args.parsers:
+        runParserBenchmark (args.layout, args.dromes, args.charts, args.page_kb, args.heliports)
+    if args.benchmark:
+        runBenchmark (args.layout, args.sizes, args.charts, args.page_kb, crawlArgs, args.host, args.work)
+    if args.serve:
+        serveSite (args.serve, args.host, args.port)
+        logger.info ("Crawl it with: python aipParser.py --region {0} --base-url http://{1}:{2}/{3}".format(args.layout, args.host, args.port, args.layout.lower()))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    if not (args.generate or args.parsers or args.benchmark or args.serve):
+        parser.print_help()
+
+    return
+
+
+if __name__ == "__main__":
+    main()
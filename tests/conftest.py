@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# the tests import the aip package from the script folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# wall clock checks depend on how busy the machine is, so they only run
+# when asked for with --timing
+def pytest_addoption ( parser ):
+    parser.addoption("--timing", action="store_true", default=False, help="also run the parser timing checks")
+
+
+def pytest_configure ( config ):
+    config.addinivalue_line("markers", "timing: wall clock check, only run with --timing")
+
+
+def pytest_collection_modifyitems ( config, items ):
+    if config.getoption("--timing"):
+        return
+
+    skipTiming = pytest.mark.skip(reason="timing check, run with --timing")
+    for item in items:
+        if "timing" in item.keywords:
+            item.add_marker(skipTiming)
@@ -0,0 +1,165 @@
+##################################################################
+#
+# Checks the IE and NL parsers against the row loops they replaced, on
+# saved pages with nested tables, empty cells and header rows, and, with
+# --timing, that they are faster on a wide chart table.
+#
+# Run from the script folder with:
+#   python -m pytest tests
+#   python -m pytest tests --timing
+#
+##################################################################
+
+import os
+import time
+
+import pytest
+
+from aip.core import adType2, aipPages, parseWebPage
+from aip.regions import ie, nl
+
+
+fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+#
+# Common routine to parse a saved page
+#
+def getFixture ( name ):
+    with open(os.path.join(fixtures, name), "rb") as file:
+        return parseWebPage(file.read())
+
+
+#
+# IE main page row loop before it scanned each row once, yielding the
+# (type, code, name, href) of each drome link
+#
+def parseMainPageIEBefore ( aipBaseUrl, html ):
+    for tr in html.find_all("tr"):
+        href = ""
+        code = ""
+        name = ""
+        type = ""
+        for td in tr.find_all("td"):
+            for link in tr.find_all("a"):
+                if "Chart Information" in link.get_text():
+                    href = link["href"]
+                    code = href.split("_")[1].upper()
+                    # fudge for ireland west link
+                    if len(link.get_text()) > 19:
+                        name = link.get_text()[:(len(link.get_text()) - 18)]
+                    type = adType2
+                else:
+                    # fudge for ireland west link
+                    name = link.get_text().strip()
+
+        if (href and code):
+            yield type, code, name, aipBaseUrl + "/" + href
+
+
+#
+# IE drome page row loop before it scanned each row once
+#
+def parseDromePageIEBefore ( type, code, baseUrl, html ):
+    pdfPages = {}
+    for tr in html.find_all("tr"):
+        title = ""
+        href = ""
+
+        for td in tr.find_all("td"):
+            # grab the link title
+            for p in tr.find_all("p"):
+                title = p.get_text().replace("\r", "").replace("\n", "")
+            # grab the link href
+            for link in tr.find_all("a"):
+                if ("href" in link.attrs):
+                    href = link["href"]
+
+        if (title and href):
+            pdfPages[title] = baseUrl + "/" + href, code + " - " + title.replace("/", "-") + ".pdf"
+
+    return pdfPages
+
+
+#
+# NL drome page row loop before it scanned each row once
+#
+def parseDromePageNLBefore ( type, code, baseUrl, html ):
+    pdfPages = {}
+    for div in html.find_all("div"):
+        # check if we are in the charts section
+        if ("id" in div.attrs):
+            id = div["id"].upper()
+            if (id != code + "-AD-2.24") and (id != code + "-AD-3.23"):
+                continue
+        else:
+            continue
+
+        for tr in div.find_all("tr"):
+            title = ""
+            href = ""
+            for td in tr.find_all("td"):
+                if not title:
+                    title = td.get_text()
+                for link in tr.find_all("a"):
+                    if ("href" in link.attrs):
+                        href = link["href"]
+
+            if (title and href):
+                pdfPages[title] = baseUrl + "/" + href.replace("../", ""), code + " - " + title.replace("/", "-") + ".pdf"
+
+    return pdfPages
+
+
+#
+# Common routine to get the best of a few timed runs of a parser
+#
+def getParseSeconds ( dromeParser, code, html ):
+    seconds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        dromeParser(adType2, code, "http://aip", html)
+        seconds.append(time.perf_counter() - start)
+
+    return min(seconds)
+
+
+def test_ie_main_page_unchanged ( monkeypatch ):
+    html = getFixture("ie_main.html")
+    monkeypatch.setattr(ie, "getWebPage", lambda *args: html)
+    aipPages[adType2].clear()
+
+    dromes = [(type, code, name, href) for type, code, name, baseUrl, href in ie.parseMainPageIE("http://aip", "IE")]
+    aipPages[adType2].clear()
+
+    assert dromes
+    assert dromes == list(parseMainPageIEBefore("http://aip", html))
+
+
+def test_ie_drome_page_unchanged ():
+    html = getFixture("ie_drome.html")
+    pdfPages = ie.parseDromePageIE(adType2, "EIDW", "http://aip", html)
+
+    assert pdfPages
+    assert list(pdfPages.items()) == list(parseDromePageIEBefore(adType2, "EIDW", "http://aip", html).items())
+
+
+def test_nl_drome_page_unchanged ():
+    html = getFixture("nl_drome.html")
+    pdfPages = nl.parseDromePage(adType2, "EHAA", "http://aip", html)
+
+    assert pdfPages
+    assert list(pdfPages.items()) == list(parseDromePageNLBefore(adType2, "EHAA", "http://aip", html).items())
+
+
+def test_wide_table_unchanged ():
+    html = getFixture("wide_drome.html")
+    for dromeParser, dromeParserBefore in ((ie.parseDromePageIE, parseDromePageIEBefore), (nl.parseDromePage, parseDromePageNLBefore)):
+        assert list(dromeParser(adType2, "EHAA", "http://aip", html).items()) == list(dromeParserBefore(adType2, "EHAA", "http://aip", html).items())
+
+
+@pytest.mark.timing
+def test_wide_table_faster ():
+    html = getFixture("wide_drome.html")
+    for dromeParser, dromeParserBefore in ((ie.parseDromePageIE, parseDromePageIEBefore), (nl.parseDromePage, parseDromePageNLBefore)):
+        assert getParseSeconds(dromeParser, "EHAA", html) < getParseSeconds(dromeParserBefore, "EHAA", html) / 2